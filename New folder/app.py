@@ -64,47 +64,6 @@
 #         return []
 
 
-# def triples_to_graph_json(triples):
-#     """
-#     Convert triples into a nodes/links JSON structure suitable for D3 force graph.
-#     Nodes are unique by name; links include a 'label' property for predicate.
-#     """
-#     nodes_map = {}
-#     links = []
-#     for t in triples:
-#         if not all(k in t for k in ("subj", "pred", "obj")):
-#             continue
-#         subj = str(t["subj"]).strip()
-#         obj = str(t["obj"]).strip()
-#         pred = str(t["pred"]).strip()
-#         if subj == "" or obj == "":
-#             continue
-#         # Add nodes if not exists
-#         for name in (subj, obj):
-#             if name not in nodes_map:
-#                 nodes_map[name] = {
-#                     "id": name,
-#                     "label": name,
-#                     # a simple initial radius; will be scaled in front-end
-#                     "size": 20
-#                 }
-#         links.append({"source": subj, "target": obj, "label": pred})
-
-#     # adjust node sizes by degree (optional)
-#     G = nx.DiGraph()
-#     for n in nodes_map:
-#         G.add_node(n)
-#     for l in links:
-#         G.add_edge(l["source"], l["target"])
-#     degrees = dict(G.degree())
-#     for n, deg in degrees.items():
-#         # scale size: base 12 + degree*6
-#         nodes_map[n]["size"] = 12 + deg * 6
-
-#     graph = {"nodes": list(nodes_map.values()), "links": links}
-#     return graph
-
-
 # @app.route("/", methods=["GET", "POST"])
 # def index():
 #     if request.method == "POST":
@@ -158,13 +117,21 @@
 
 # app.py
 import os
+import sys
 import json
-import re
-from flask import Flask, render_template, request, redirect, url_for, flash
+import gzip
+import threading
+from collections import OrderedDict
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
 from dotenv import load_dotenv
-from mistralai import Mistral
-import networkx as nx
 import spacy # <-- Import spaCy
+from basic_extractor import extract_triples_basic
+from graph_view import GraphViewRegistry, compact_diff, compact_top_k, encode_payload
+
+# Shared modules (e.g. the Mistral client pool) live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mistral_pool import get_mistral_client, get_client_pool
+from entity_resolution import canonicalize_triples
 
 # Load the spaCy model
 try:
@@ -179,6 +146,18 @@ API_KEY_ENV = os.getenv("MISTRAL_API_KEY", "")
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "supersecretkey")
 
+# Graphs are laid out server-side once and cached; the page starts with the
+# top-k nodes by degree and pulls neighbourhoods through the paged API.
+INITIAL_TOP_K = int(os.getenv("GRAPH_INITIAL_TOP_K", "300"))
+NEIGHBOUR_PAGE_LIMIT = 500
+graph_views = GraphViewRegistry(max_graphs=int(os.getenv("GRAPH_CACHE_SIZE", "32")))
+
+# Encoded compact payloads, keyed by (graph ids, top-k, format, gzip). Graph ids
+# are content hashes, so an entry never goes stale.
+PAYLOAD_CACHE_SIZE = 64
+_payload_cache = OrderedDict()
+_payload_lock = threading.Lock()
+
 # --- Extractor Functions ---
 
 def extract_triples_spacy(text):
@@ -211,32 +190,6 @@ def extract_triples_spacy(text):
     return triples
 
 
-def simple_nlp_extractor(sentence):
-    """A basic NLP function to find subject, predicate, object triples."""
-    common_verbs = [
-        'is', 'are', 'was', 'were', 'has', 'have', 'had', 'likes', 'owns',
-        'belongs to', 'jumps over', 'sat on', 'lives in', 'chase', 'made of',
-        'love', 'eat', 'drink', 'wear', 'see', 'proposed', 'created', 'defeated',
-        'published in', 'works on'
-    ]
-    sentence = re.sub(r'[.,!?]', '', sentence).lower()
-    for verb in common_verbs:
-        pattern = r'\b' + re.escape(verb) + r'\b'
-        parts = re.split(pattern, sentence, maxsplit=1)
-        if len(parts) == 2:
-            subj, obj = parts[0].strip(), parts[1].strip()
-            if subj and obj:
-                clean_subj = re.sub(r'^(the|a|an)\s+', '', subj).strip()
-                clean_obj = re.sub(r'^(the|a|an)\s+', '', obj).strip()
-                return {'subj': clean_subj.title(), 'pred': verb, 'obj': clean_obj.title()}
-    return None
-
-def extract_triples_basic(text):
-    """Extracts triples using the basic NLP sentence-by-sentence method."""
-    sentences = re.split(r'[.!?]+', text)
-    triples = [triple for s in sentences if s.strip() and (triple := simple_nlp_extractor(s))]
-    return triples
-
 def extract_triples_with_mistral(text, api_key):
     """Uses Mistral AI to extract triples for higher accuracy."""
     if not api_key:
@@ -245,7 +198,7 @@ def extract_triples_with_mistral(text, api_key):
             {"subj": "Turing Test", "pred": "published in", "obj": "Computing Machinery and Intelligence"},
         ]
     try:
-        client = Mistral(api_key=api_key)
+        client = get_mistral_client(api_key)
         system_prompt = "You are an expert knowledge extraction system. Extract precise subject-predicate-object triples. Return ONLY a JSON object with a single key 'triples' which maps to a list of objects, each with 'subj', 'pred', and 'obj' keys."
         user_prompt = f"Extract triples from the following text:\n\n{text}"
         response = client.chat.complete(
@@ -261,21 +214,13 @@ def extract_triples_with_mistral(text, api_key):
 
 # --- Graph Conversion & Routes ---
 
-def triples_to_graph_json(triples):
-    """Converts a list of triples to a D3.js-compatible graph JSON."""
-    nodes_map = {}
-    links = []
-    for t in triples:
-        subj, pred, obj = str(t.get("subj")).strip(), str(t.get("pred")).strip(), str(t.get("obj")).strip()
-        if not all((subj, pred, obj)): continue
-        for name in (subj, obj):
-            if name not in nodes_map: nodes_map[name] = {"id": name, "label": name, "size": 20}
-        links.append({"source": subj, "target": obj, "label": pred})
-    if not nodes_map: return {"nodes": [], "links": []}
-    G = nx.DiGraph([(l["source"], l["target"]) for l in links])
-    degrees = dict(G.degree())
-    for n, deg in degrees.items(): nodes_map[n]["size"] = 12 + deg * 4
-    return {"nodes": list(nodes_map.values()), "links": links}
+def extract_triples(text, engine, api_key=""):
+    """Runs the selected extractor ('mistral', 'spacy' or 'basic') on a text."""
+    if engine == 'mistral':
+        return extract_triples_with_mistral(text, api_key or API_KEY_ENV)
+    if engine == 'spacy':
+        return extract_triples_spacy(text)
+    return extract_triples_basic(text)
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -297,24 +242,114 @@ def index():
             flash("Please provide text or upload a file.", "error")
             return redirect(url_for("index"))
 
-        triples = []
-        if engine == 'mistral':
-            api_key = request.form.get("api_key", "").strip()
-            use_key = api_key if api_key else API_KEY_ENV
-            triples = extract_triples_with_mistral(text, use_key)
-        elif engine == 'spacy':
-            triples = extract_triples_spacy(text)
-        else: # 'basic' engine
-            triples = extract_triples_basic(text)
+        triples = extract_triples(text, engine, request.form.get("api_key", "").strip())
 
         if not triples:
             flash("No relationships could be extracted with the selected engine.", "error")
             return redirect(url_for("index"))
 
-        graph = triples_to_graph_json(triples)
-        return render_template("graph.html", graph_json=json.dumps(graph))
+        # "Apple", "Apple Inc." and "apple" become one node
+        triples = canonicalize_triples(triples)
+        view = graph_views.add(triples)
+        # The page fetches the graph from the cacheable compact endpoint
+        return render_template("graph.html", graph_id=view.graph_id, top_k=INITIAL_TOP_K)
 
     return render_template("index.html", api_key=API_KEY_ENV)
 
+@app.route("/api/graph/<graph_id>")
+def api_graph_top(graph_id):
+    """Returns the top-k nodes by degree (with layout) of a cached graph."""
+    view = graph_views.get(graph_id)
+    if view is None:
+        return jsonify({"error": "Unknown or expired graph."}), 404
+    top_k = max(request.args.get("top_k", INITIAL_TOP_K, type=int), 0)
+    return jsonify(view.top_k(top_k))
+
+@app.route("/api/graph/<graph_id>/neighbours")
+def api_graph_neighbours(graph_id):
+    """Returns one page of a node's neighbours (with layout) of a cached graph."""
+    view = graph_views.get(graph_id)
+    if view is None:
+        return jsonify({"error": "Unknown or expired graph."}), 404
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), NEIGHBOUR_PAGE_LIMIT)
+    page = view.neighbours(request.args.get("node", ""), offset=offset, limit=limit)
+    if page is None:
+        return jsonify({"error": "Unknown node."}), 404
+    return jsonify(page)
+
+def _compact_response(cache_key, build):
+    """Serves a compact payload as JSON or MessagePack, gzipped when accepted, with immutable caching."""
+    fmt = "msgpack" if request.args.get("format") == "msgpack" else "json"
+    use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+    key = cache_key + (fmt, use_gzip)
+    with _payload_lock:
+        cached = _payload_cache.get(key)
+        if cached is not None:
+            _payload_cache.move_to_end(key)
+    if cached is None:
+        payload = build()
+        if payload is None:
+            return jsonify({"error": "Unknown or expired graph."}), 404
+        body, mimetype = encode_payload(payload, fmt)
+        if use_gzip:
+            body = gzip.compress(body, compresslevel=6)
+        cached = (body, mimetype)
+        with _payload_lock:
+            _payload_cache[key] = cached
+            while len(_payload_cache) > PAYLOAD_CACHE_SIZE:
+                _payload_cache.popitem(last=False)
+    body, mimetype = cached
+    response = Response(body, mimetype=mimetype)
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    # Graph ids hash the triples and the view whose layout they extend, so a given URL never changes
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.set_etag("-".join(str(part) for part in key))
+    return response.make_conditional(request)
+
+@app.route("/api/graph/<graph_id>/compact")
+def api_graph_compact(graph_id):
+    """Returns the top-k nodes of a cached graph in the compact transport format."""
+    top_k = max(request.args.get("top_k", INITIAL_TOP_K, type=int), 0)
+    def build():
+        view = graph_views.get(graph_id)
+        return None if view is None else compact_top_k(view, top_k)
+    return _compact_response(("top", graph_id, top_k), build)
+
+@app.route("/api/graph/<graph_id>/diff/<base_id>")
+def api_graph_diff(graph_id, base_id):
+    """Returns the compact changes turning the top-k view of base_id into that of graph_id."""
+    top_k = max(request.args.get("top_k", INITIAL_TOP_K, type=int), 0)
+    def build():
+        view, base = graph_views.get(graph_id), graph_views.get(base_id)
+        return None if view is None or base is None else compact_diff(base, view, top_k)
+    return _compact_response(("diff", graph_id, base_id, top_k), build)
+
+@app.route("/api/graph/<graph_id>/extend", methods=["POST"])
+def api_graph_extend(graph_id):
+    """Adds the triples of a new text to a cached graph; existing nodes keep their positions."""
+    base = graph_views.get(graph_id)
+    if base is None:
+        return jsonify({"error": "Unknown or expired graph."}), 404
+    text = request.form.get("text", "").strip()
+    if not text:
+        return jsonify({"error": "Please provide text."}), 400
+    new_triples = extract_triples(text, request.form.get("engine", "spacy"), request.form.get("api_key", "").strip())
+    if not new_triples:
+        return jsonify({"error": "No relationships could be extracted with the selected engine."}), 422
+    view = graph_views.add(canonicalize_triples(base.triples() + new_triples), base=base)
+    top_k = max(request.form.get("top_k", INITIAL_TOP_K, type=int), 0)
+    return jsonify({
+        "graph_id": view.graph_id,
+        "diff_url": url_for("api_graph_diff", graph_id=view.graph_id, base_id=base.graph_id, top_k=top_k),
+    })
+
+@app.route("/api/metrics/mistral")
+def api_mistral_metrics():
+    """Returns Mistral client and HTTP connection reuse counters."""
+    return jsonify(get_client_pool().stats())
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
\ No newline at end of file
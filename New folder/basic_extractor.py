@@ -0,0 +1,66 @@
+"""
+Basic rule-based triple extractor.
+
+Finds the first verb phrase from a lexicon in each sentence and splits the
+sentence around it into subject and object. The whole lexicon is compiled
+into one alternation, so each sentence is scanned once.
+"""
+
+import re
+from functools import lru_cache
+
+DEFAULT_VERB_LEXICON = (
+    'is', 'are', 'was', 'were', 'has', 'have', 'had', 'likes', 'owns',
+    'belongs to', 'jumps over', 'sat on', 'lives in', 'chase', 'made of',
+    'love', 'eat', 'drink', 'wear', 'see', 'proposed', 'created', 'defeated',
+    'published in', 'works on'
+)
+
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_PUNCTUATION_RE = re.compile(r'[.,!?]')
+_LEADING_ARTICLE_RE = re.compile(r'^(?:the|a|an)\s+')
+
+
+@lru_cache(maxsize=32)
+def _compile_lexicon(verbs):
+    # Longer phrases go first so that at any position the alternation
+    # prefers "published in" over a shorter verb starting at the same place.
+    ordered = sorted({v.strip().lower() for v in verbs if v.strip()}, key=len, reverse=True)
+    if not ordered:
+        return None
+    return re.compile(r'\b(?:' + '|'.join(re.escape(v) for v in ordered) + r')\b')
+
+
+def build_verb_matcher(verbs=DEFAULT_VERB_LEXICON):
+    """Returns a compiled pattern matching any verb phrase in the lexicon."""
+    return _compile_lexicon(tuple(verbs))
+
+
+def simple_nlp_extractor(sentence, matcher=None):
+    """
+    Finds a subject, predicate, object triple in a single sentence.
+
+    The earliest verb match wins; at equal positions the longest phrase wins.
+    Returns None if no verb splits the sentence into a non-empty subject
+    and object.
+    """
+    if matcher is None:
+        matcher = build_verb_matcher()
+    if matcher is None:
+        return None
+    sentence = _PUNCTUATION_RE.sub('', sentence).lower()
+    for match in matcher.finditer(sentence):
+        subj = sentence[:match.start()].strip()
+        obj = sentence[match.end():].strip()
+        if subj and obj:
+            clean_subj = _LEADING_ARTICLE_RE.sub('', subj).strip()
+            clean_obj = _LEADING_ARTICLE_RE.sub('', obj).strip()
+            return {'subj': clean_subj.title(), 'pred': match.group(), 'obj': clean_obj.title()}
+    return None
+
+
+def extract_triples_basic(text, verbs=DEFAULT_VERB_LEXICON):
+    """Extracts triples using the basic NLP sentence-by-sentence method."""
+    matcher = build_verb_matcher(verbs)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
+    return [triple for s in sentences if s.strip() and (triple := simple_nlp_extractor(s, matcher))]
@@ -0,0 +1,422 @@
+"""
+Server-side graph views for the D3 front-end.
+
+Layout coordinates are computed once per graph and cached, so the browser
+only draws. Large graphs are shipped level-of-detail: the top-k nodes by
+degree first, with neighbourhoods paged in on demand. The compact transport
+sends a string table and index-based columns instead of repeating names.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    import msgpack  # optional: binary transport
+except ImportError:
+    msgpack = None
+
+import networkx as nx
+import numpy as np
+
+# Above this many nodes the O(n^2) spring layout is replaced by laying out
+# each connected component on its own (spectral for components this large)
+# and packing the components side by side, which stays fast for tens of
+# thousands of nodes.
+SPRING_LAYOUT_MAX_NODES = 2000
+
+COMPACT_VERSION = 1
+# Coordinates are sent as integers in units of 1e-4
+COORD_SCALE = 10000
+
+
+def graph_id_for(triples, base_id=None):
+    """
+    Content hash identifying the graph built from a list of triples.
+
+    Node positions depend on the view the layout extends, so base_id is part
+    of the hash: the same id always means the same coordinates.
+    """
+    payload = json.dumps(
+        [base_id, [(str(t.get("subj")).strip(), str(t.get("pred")).strip(), str(t.get("obj")).strip())
+                   for t in triples]],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class GraphView:
+    """Indexed, layout-cached view of a triple graph."""
+
+    def __init__(self, triples, graph_id=None, base=None):
+        self.base_id = base.graph_id if base is not None else None
+        self.graph_id = graph_id or graph_id_for(triples, self.base_id)
+        self._base = base  # earlier view whose node positions are kept (until laid out)
+        self.names = []       # node index -> name
+        self.index = {}       # name -> node index
+        self.links = []       # (source index, target index, label)
+        self.incident = []    # node index -> list of link indices
+
+        for t in triples:
+            subj, pred, obj = str(t.get("subj")).strip(), str(t.get("pred")).strip(), str(t.get("obj")).strip()
+            if not all((subj, pred, obj)):
+                continue
+            s, o = self._node(subj), self._node(obj)
+            self.incident[s].append(len(self.links))
+            if o != s:
+                self.incident[o].append(len(self.links))
+            self.links.append((s, o, pred))
+
+        # Degree counts distinct directed edges, so parallel predicates count once
+        digraph = nx.DiGraph()
+        digraph.add_nodes_from(range(len(self.names)))
+        digraph.add_edges_from((s, o) for s, o, _ in self.links)
+        self.degree = np.array([d for _, d in sorted(digraph.degree())], dtype=np.int64)
+        # Stable order: highest degree first, ties by first appearance
+        self.rank = np.argsort(-self.degree, kind="stable")
+
+        self._positions = None
+        self._lock = threading.Lock()
+
+    def _node(self, name):
+        idx = self.index.get(name)
+        if idx is None:
+            idx = len(self.names)
+            self.index[name] = idx
+            self.names.append(name)
+            self.incident.append([])
+        return idx
+
+    @property
+    def positions(self):
+        """(n, 2) array of layout coordinates in [-1, 1], computed once."""
+        if self._positions is None:
+            with self._lock:
+                if self._positions is None:
+                    self._positions = self._compute_layout()
+        return self._positions
+
+    def _compute_layout(self):
+        n = len(self.names)
+        if n == 0:
+            return np.zeros((0, 2))
+        graph = nx.Graph()
+        graph.add_nodes_from(range(n))
+        graph.add_edges_from((s, o) for s, o, _ in self.links if s != o)
+        base, self._base = self._base, None
+        if base is not None:
+            fixed = {i: base.positions[base.index[name]] for i, name in enumerate(self.names) if name in base.index}
+            if fixed:
+                return self._extend_layout(graph, fixed)
+        if n <= SPRING_LAYOUT_MAX_NODES:
+            pos = nx.spring_layout(graph, iterations=50, seed=42)
+            coords = np.array([pos[i] for i in range(n)], dtype=np.float64)
+        else:
+            coords = _packed_component_layout(graph)
+        span = np.abs(coords).max()
+        return coords / span if span > 0 else coords
+
+    def _extend_layout(self, graph, fixed):
+        """Keep nodes of the earlier graph in place and lay out only new ones."""
+        n = len(self.names)
+        if n <= SPRING_LAYOUT_MAX_NODES:
+            pos = nx.spring_layout(graph, pos=fixed, fixed=list(fixed), iterations=50, seed=42)
+            return self._fit_new_nodes(np.array([pos[i] for i in range(n)], dtype=np.float64), fixed)
+        # Large graphs: put each new node near its already placed neighbours
+        rng = np.random.default_rng(42)
+        coords = np.zeros((n, 2))
+        placed = np.zeros(n, dtype=bool)
+        for i, xy in fixed.items():
+            coords[i] = xy
+            placed[i] = True
+        for i in self.rank:
+            if placed[i]:
+                continue
+            neighbours = [j for j in graph.neighbors(i) if placed[j]]
+            if neighbours:
+                coords[i] = coords[neighbours].mean(axis=0) + rng.normal(0, 0.02, 2)
+            else:
+                coords[i] = rng.uniform(-1, 1, 2)
+            placed[i] = True
+        return self._fit_new_nodes(coords, fixed)
+
+    @staticmethod
+    def _fit_new_nodes(coords, fixed):
+        """
+        Scales new nodes into [-1, 1] like _compute_layout does.
+
+        Kept nodes are already in range and must not move (clients applying
+        a diff still show them at their old positions), so only new ones are scaled.
+        """
+        new = np.ones(len(coords), dtype=bool)
+        new[list(fixed)] = False
+        span = np.abs(coords[new]).max() if new.any() else 0
+        if span > 1:
+            coords[new] /= span
+        return coords
+
+    def triples(self):
+        """The (canonical) triples this view was built from."""
+        return [{"subj": self.names[s], "pred": label, "obj": self.names[o]} for s, o, label in self.links]
+
+    def node_json(self, idx):
+        x, y = self.positions[idx]
+        return {
+            "id": self.names[idx],
+            "label": self.names[idx],
+            "size": 12 + int(self.degree[idx]) * 4,
+            "degree": int(self.degree[idx]),
+            "x": round(float(x), 4),
+            "y": round(float(y), 4),
+        }
+
+    def link_json(self, link_idx):
+        s, o, label = self.links[link_idx]
+        return {"source": self.names[s], "target": self.names[o], "label": label}
+
+    def _top_k_ids(self, k):
+        selected = [int(i) for i in self.rank[:max(k, 0)]]
+        chosen = set(selected)
+        link_ids = sorted({
+            li for i in selected for li in self.incident[i]
+            if self.links[li][0] in chosen and self.links[li][1] in chosen
+        })
+        return selected, link_ids
+
+    def link_key(self, link_idx):
+        s, o, label = self.links[link_idx]
+        return self.names[s], label, self.names[o]
+
+    def top_k(self, k):
+        """Top-k nodes by degree plus the links among them."""
+        selected, link_ids = self._top_k_ids(k)
+        return {
+            "graph_id": self.graph_id,
+            "total_nodes": len(self.names),
+            "total_links": len(self.links),
+            "nodes": [self.node_json(i) for i in selected],
+            "links": [self.link_json(li) for li in link_ids],
+        }
+
+    def neighbours(self, name, offset=0, limit=50):
+        """
+        One page of a node's neighbourhood, highest-degree neighbours first.
+
+        Returns None if the node is unknown.
+        """
+        idx = self.index.get(name)
+        if idx is None:
+            return None
+        by_neighbour = OrderedDict()
+        for li in self.incident[idx]:
+            s, o, _ = self.links[li]
+            other = o if s == idx else s
+            by_neighbour.setdefault(other, []).append(li)
+        ordered = sorted(by_neighbour, key=lambda i: (-self.degree[i], i))
+        page = ordered[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(ordered) else None
+        return {
+            "graph_id": self.graph_id,
+            "node": name,
+            "offset": offset,
+            "limit": limit,
+            "total": len(ordered),
+            "next_offset": next_offset,
+            "nodes": [self.node_json(i) for i in page],
+            "links": [self.link_json(li) for i in page for li in by_neighbour[i]],
+        }
+
+
+def _component_layout(graph, nodes):
+    """Layout of one connected component, centred on the origin and fitted into the unit disc."""
+    k = len(nodes)
+    if k <= 3:
+        # Pairs and triangles/paths of three: evenly on a circle, no simulation needed
+        if k == 1:
+            return np.zeros((1, 2))
+        angles = 2 * np.pi * np.arange(k) / k
+        return np.column_stack([np.cos(angles), np.sin(angles)])
+    sub = graph.subgraph(nodes)
+    if k <= SPRING_LAYOUT_MAX_NODES:
+        pos = nx.spring_layout(sub, iterations=50, seed=42)
+        coords = np.array([pos[i] for i in nodes], dtype=np.float64)
+    else:
+        # Spectral coordinates bunch up and coincide for structurally
+        # equivalent nodes (e.g. leaves of the same hub); replacing each axis
+        # by its rank keeps the ordering but spreads nodes evenly
+        pos = nx.spectral_layout(sub)
+        coords = np.array([pos[i] for i in nodes], dtype=np.float64)
+        for axis in range(2):
+            coords[np.argsort(coords[:, axis], kind="stable"), axis] = np.linspace(-1, 1, k)
+    coords -= coords.mean(axis=0)
+    radius = np.linalg.norm(coords, axis=1).max()
+    return coords / radius if radius > 0 else coords
+
+
+def _packed_component_layout(graph):
+    """
+    Lays out each connected component separately and packs them in rows.
+
+    A layout of the whole graph puts disconnected components on top of each
+    other (spectral layout collapses each one onto a single point). Each
+    component gets a square cell whose side grows with the square root of
+    its size, largest first, in rows about as wide as the packing is tall.
+    """
+    n = graph.number_of_nodes()
+    components = sorted((sorted(c) for c in nx.connected_components(graph)), key=lambda c: (-len(c), c[0]))
+    sides = [np.sqrt(len(c)) for c in components]
+    row_width = max(np.sqrt(sum(side * side for side in sides)), sides[0])
+    coords = np.zeros((n, 2))
+    x = y = row_height = 0.0
+    for nodes, side in zip(components, sides):
+        if x > 0 and x + side > row_width:
+            x, y, row_height = 0.0, y + row_height, 0.0
+        # Leave a margin between cells so neighbouring components do not touch
+        center = np.array([x + side / 2, y + side / 2])
+        coords[nodes] = center + _component_layout(graph, nodes) * (side / 2) * 0.9
+        x += side
+        row_height = max(row_height, side)
+    return coords - (coords.min(axis=0) + coords.max(axis=0)) / 2
+
+
+class GraphViewRegistry:
+    """Bounded LRU cache of GraphViews keyed by graph id."""
+
+    def __init__(self, max_graphs=32):
+        self.max_graphs = max_graphs
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, triples, base=None):
+        """Registers the graph of a triple list; base keeps an earlier view's node positions."""
+        graph_id = graph_id_for(triples, base.graph_id if base is not None else None)
+        with self._lock:
+            view = self._views.get(graph_id)
+            if view is not None:
+                self._views.move_to_end(graph_id)
+                return view
+        view = GraphView(triples, graph_id=graph_id, base=base)
+        with self._lock:
+            self._views[graph_id] = view
+            self._views.move_to_end(graph_id)
+            while len(self._views) > self.max_graphs:
+                self._views.popitem(last=False)
+        return view
+
+    def get(self, graph_id):
+        with self._lock:
+            view = self._views.get(graph_id)
+            if view is not None:
+                self._views.move_to_end(graph_id)
+            return view
+
+
+class _StringTable:
+    """Interns strings into a list; payload fields refer to them by index."""
+
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def __call__(self, value):
+        idx = self._index.get(value)
+        if idx is None:
+            idx = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+
+def _compact_columns(view, table, node_ids, links):
+    positions = view.positions
+    nodes = {
+        "name": [table(view.names[i]) for i in node_ids],
+        "degree": [int(view.degree[i]) for i in node_ids],
+        "x": [int(round(float(positions[i][0]) * COORD_SCALE)) for i in node_ids],
+        "y": [int(round(float(positions[i][1]) * COORD_SCALE)) for i in node_ids],
+    }
+    columns = {
+        "source": [table(source) for source, _, _ in links],
+        "label": [table(label) for _, label, _ in links],
+        "target": [table(target) for _, _, target in links],
+    }
+    return nodes, columns
+
+
+def compact_top_k(view, k):
+    """
+    Compact form of view.top_k(k).
+
+    Node and link fields are parallel arrays; names and labels are indices
+    into "strings", and coordinates are integers in units of 1/COORD_SCALE.
+    """
+    table = _StringTable()
+    selected, link_ids = view._top_k_ids(k)
+    nodes, links = _compact_columns(view, table, selected, [view.link_key(li) for li in link_ids])
+    return {
+        "v": COMPACT_VERSION,
+        "graph_id": view.graph_id,
+        "total_nodes": len(view.names),
+        "total_links": len(view.links),
+        "coord_scale": COORD_SCALE,
+        "nodes": nodes,
+        "links": links,
+        "strings": table.strings,
+    }
+
+
+def compact_diff(old, new, k):
+    """
+    Changes a client showing old.top_k(k) needs to show new.top_k(k).
+
+    Contains the new graph's top-k nodes the client lacks or whose degree
+    changed, the links among them that are new, and every node and link
+    that no longer exists (e.g. after aliases merged). Node positions of
+    the old graph are unchanged when new was built with base=old.
+    """
+    table = _StringTable()
+    old_selected, old_link_ids = old._top_k_ids(k)
+    new_selected, new_link_ids = new._top_k_ids(k)
+    old_shown = {old.names[i] for i in old_selected}
+
+    changed = []
+    for i in new_selected:
+        name = new.names[i]
+        old_idx = old.index.get(name)
+        if name not in old_shown or old.degree[old_idx] != new.degree[i]:
+            changed.append(i)
+    # Nodes still shown from before whose degree changed although they left the top-k
+    new_shown = set(new_selected)
+    for name in old_shown:
+        i = new.index.get(name)
+        if i is not None and i not in new_shown and old.degree[old.index[name]] != new.degree[i]:
+            changed.append(i)
+
+    shown_links = {old.link_key(li) for li in old_link_ids}
+    added_links = [key for key in (new.link_key(li) for li in new_link_ids) if key not in shown_links]
+    new_keys = {new.link_key(li) for li in range(len(new.links))}
+    removed_links = [key for key in (old.link_key(li) for li in range(len(old.links))) if key not in new_keys]
+    removed_nodes = [table(name) for name in old.names if name not in new.index]
+
+    nodes, links = _compact_columns(new, table, changed, added_links)
+    _, removed = _compact_columns(new, table, [], removed_links)
+    return {
+        "v": COMPACT_VERSION,
+        "graph_id": new.graph_id,
+        "base_id": old.graph_id,
+        "total_nodes": len(new.names),
+        "total_links": len(new.links),
+        "coord_scale": COORD_SCALE,
+        "nodes": nodes,
+        "links": links,
+        "removed_nodes": removed_nodes,
+        "removed_links": removed,
+        "strings": table.strings,
+    }
+
+
+def encode_payload(payload, fmt="json"):
+    """Serializes a payload as (bytes, mimetype); msgpack falls back to JSON if not installed."""
+    if fmt == "msgpack" and msgpack is not None:
+        return msgpack.packb(payload, use_bin_type=True), "application/x-msgpack"
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), "application/json"
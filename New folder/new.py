@@ -4,14 +4,21 @@
 
 import networkx as nx
 import os
+import sys
 import json
-from mistralai import Mistral
 from getpass import getpass
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, send_file
-import matplotlib.pyplot as plt
+from flask import Flask, render_template, request, send_file, Response, abort
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import io
-import base64
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Shared modules (e.g. the Mistral client pool) live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mistral_pool import get_mistral_client
 
 # Load API key from .env file
 load_dotenv()
@@ -24,7 +31,7 @@ def extract_triples_with_mistral(text, api_key):
     Uses the Mistral AI API to extract subject-predicate-object triples from text.
     """
     try:
-        client = Mistral(api_key=api_key)
+        client = get_mistral_client(api_key)
     except Exception as e:
         print(f"Error configuring the Mistral client: {e}")
         return []
@@ -80,59 +87,163 @@ def extract_triples_with_mistral(text, api_key):
         return []
 
 
-def create_knowledge_graph(triples):
-    """
-    Creates a knowledge graph visualization and returns it as a base64 encoded image.
-    """
-    if not triples:
+# Rendered graphs are cached by a hash of their triples, so a repeated request
+# for the same graph is served from memory instead of being redrawn.
+GRAPH_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'json': 'application/json',
+}
+MAX_CACHED_GRAPHS = 64
+
+_graph_cache_lock = threading.Lock()
+_graph_triples = OrderedDict()   # key -> triples
+_graph_layouts = {}              # key -> (graph, pos)
+_rendered_graphs = OrderedDict() # (key, fmt) -> bytes
+
+
+def _triples_key(triples):
+    """Content hash of a list of triples."""
+    payload = json.dumps(
+        [[str(t['subj']), str(t['pred']), str(t['obj'])] for t in triples],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def _cache_put(cache, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > MAX_CACHED_GRAPHS:
+        evicted, _ = cache.popitem(last=False)
+        if cache is _graph_triples:
+            _graph_layouts.pop(evicted, None)
+            for fmt in GRAPH_FORMATS:
+                _rendered_graphs.pop((evicted, fmt), None)
+
+
+def _graph_with_layout(key):
+    """Builds the graph for a cached key and lays it out once."""
+    with _graph_cache_lock:
+        cached = _graph_layouts.get(key)
+        triples = _graph_triples.get(key)
+    if cached is not None:
+        return cached
+    if triples is None:
         return None
 
     G = nx.DiGraph()
-
     for t in triples:
-        if not all(k in t for k in ['subj', 'pred', 'obj']):
-            continue
         subj, pred, obj = str(t['subj']), str(t['pred']), str(t['obj'])
         G.add_node(subj)
         G.add_node(obj)
         G.add_edge(subj, obj, label=pred)
+    pos = nx.spring_layout(G, k=1, iterations=50, seed=42)
+
+    with _graph_cache_lock:
+        if key in _graph_triples:
+            _graph_layouts[key] = (G, pos)
+    return G, pos
+
+
+def _render_png_or_svg(G, pos, fmt):
+    """Draws the graph on a private Figure; no global pyplot state is used."""
+    fig = Figure(figsize=(14, 10))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
 
-    # Create figure
-    plt.figure(figsize=(14, 10))
-    
-    # Use spring layout
-    pos = nx.spring_layout(G, k=1, iterations=50)
-    
     # Draw nodes
-    nx.draw_networkx_nodes(G, pos, node_size=2000, node_color='lightblue', 
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=2000, node_color='lightblue',
                           alpha=0.9, linewidths=2, edgecolors='darkblue')
-    
+
     # Draw edges
-    nx.draw_networkx_edges(G, pos, edge_color='gray', 
+    nx.draw_networkx_edges(G, pos, ax=ax, edge_color='gray',
                           arrows=True, arrowsize=20, width=2)
-    
+
     # Draw labels
-    nx.draw_networkx_labels(G, pos, font_size=10, font_family='sans-serif')
-    
+    nx.draw_networkx_labels(G, pos, ax=ax, font_size=10, font_family='sans-serif')
+
     # Draw edge labels
     edge_labels = {(u, v): d['label'] for u, v, d in G.edges(data=True)}
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=8)
-    
-    plt.title("Knowledge Graph", fontsize=16)
-    plt.axis('off')
-    plt.tight_layout()
-    
-    # Save the graph to a bytes buffer
+    nx.draw_networkx_edge_labels(G, pos, ax=ax, edge_labels=edge_labels, font_size=8)
+
+    ax.set_title("Knowledge Graph", fontsize=16)
+    ax.axis('off')
+    fig.tight_layout()
+
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    
-    # Encode the image to base64
-    image_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    plt.close()
-    
-    return image_base64
+    fig.savefig(buf, format=fmt, dpi=150, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def _render_json(G, pos):
+    """Node positions and labelled links for client-side drawing."""
+    return json.dumps({
+        'nodes': [{'id': n, 'x': round(float(pos[n][0]), 4), 'y': round(float(pos[n][1]), 4)} for n in G.nodes],
+        'links': [{'source': u, 'target': v, 'label': d['label']} for u, v, d in G.edges(data=True)],
+    }).encode('utf-8')
+
+
+def render_knowledge_graph(key, fmt='png'):
+    """
+    Returns the rendered graph for a cached key as bytes, or None if the key
+    is unknown. Each (key, format) pair is rendered at most once.
+    """
+    if fmt not in GRAPH_FORMATS:
+        return None
+    with _graph_cache_lock:
+        data = _rendered_graphs.get((key, fmt))
+        if data is not None:
+            _rendered_graphs.move_to_end((key, fmt))
+            return data
+
+    built = _graph_with_layout(key)
+    if built is None:
+        return None
+    G, pos = built
+    data = _render_json(G, pos) if fmt == 'json' else _render_png_or_svg(G, pos, fmt)
+
+    with _graph_cache_lock:
+        if key in _graph_triples:
+            _cache_put(_rendered_graphs, (key, fmt), data)
+    return data
+
+
+def create_knowledge_graph(triples):
+    """
+    Registers the triples for rendering and returns their cache key.
+
+    Rendering is deferred to the image endpoint, so the page is returned
+    without waiting for layout and drawing.
+    """
+    triples = [t for t in (triples or []) if all(k in t for k in ['subj', 'pred', 'obj'])]
+    if not triples:
+        return None
+
+    key = _triples_key(triples)
+    with _graph_cache_lock:
+        if key in _graph_triples:
+            _graph_triples.move_to_end(key)
+        else:
+            _cache_put(_graph_triples, key, triples)
+    return key
+
+
+@app.route('/graph/<key>.<fmt>')
+def graph_image(key, fmt):
+    data = render_knowledge_graph(key, fmt)
+    if data is None:
+        abort(404)
+    response = Response(data, mimetype=GRAPH_FORMATS[fmt])
+    # Keys are content hashes, so a given URL never changes
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.set_etag(f"{key}.{fmt}")
+    return response.make_conditional(request)
+
+
+def _graph_format(form):
+    fmt = form.get('format', 'png')
+    return fmt if fmt in GRAPH_FORMATS else 'png'
 
 
 @app.route('/', methods=['GET', 'POST'])
@@ -160,12 +271,14 @@ def index():
             return render_template('index.html', 
                                  error="No relationships found in the text")
         
-        # Create knowledge graph visualization
-        graph_image = create_knowledge_graph(triples)
+        # Register the graph; the image is rendered by the /graph endpoint
+        graph_key = create_knowledge_graph(triples)
+        graph_format = _graph_format(request.form)
         
         return render_template('index.html', 
                              triples=triples,
-                             graph_image=graph_image,
+                             graph_key=graph_key,
+                             graph_format=graph_format,
                              text=text,
                              api_key=use_api_key)
     
@@ -200,12 +313,14 @@ def upload_file():
             return render_template('index.html', 
                                  error="No relationships found in the text")
         
-        # Create knowledge graph visualization
-        graph_image = create_knowledge_graph(triples)
+        # Register the graph; the image is rendered by the /graph endpoint
+        graph_key = create_knowledge_graph(triples)
+        graph_format = _graph_format(request.form)
         
         return render_template('index.html', 
                              triples=triples,
-                             graph_image=graph_image,
+                             graph_key=graph_key,
+                             graph_format=graph_format,
                              text=text,
                              api_key=use_api_key)
     
@@ -251,7 +366,7 @@ if __name__ == '__main__':
             margin-bottom: 5px;
             font-weight: bold;
         }
-        input[type="text"], textarea {
+        input[type="text"], textarea, select {
             width: 100%;
             padding: 8px;
             border: 1px solid #ddd;
@@ -354,6 +469,15 @@ if __name__ == '__main__':
                 <textarea id="text" name="text" placeholder="Paste your text here...">{{ text if text else '' }}</textarea>
             </div>
             
+            <div class="form-group">
+                <label for="format">Output Format:</label>
+                <select id="format" name="format">
+                    <option value="png">PNG image</option>
+                    <option value="svg">SVG image</option>
+                    <option value="json">JSON (nodes, links, positions)</option>
+                </select>
+            </div>
+            
             <button type="submit">Generate Knowledge Graph</button>
         </form>
         
@@ -368,6 +492,15 @@ if __name__ == '__main__':
                 <input type="file" id="file" name="file" accept=".txt">
             </div>
             
+            <div class="form-group">
+                <label for="format_file">Output Format:</label>
+                <select id="format_file" name="format">
+                    <option value="png">PNG image</option>
+                    <option value="svg">SVG image</option>
+                    <option value="json">JSON (nodes, links, positions)</option>
+                </select>
+            </div>
+            
             <button type="submit">Generate Knowledge Graph</button>
         </form>
         
@@ -377,7 +510,11 @@ if __name__ == '__main__':
             <p>Found {{ triples|length }} relationships:</p>
             
             <div class="graph-container">
-                <img src="data:image/png;base64,{{ graph_image }}" alt="Knowledge Graph" class="graph-image">
+                {% if graph_format == 'json' %}
+                <a href="/graph/{{ graph_key }}.json">Download graph JSON</a>
+                {% else %}
+                <img src="/graph/{{ graph_key }}.{{ graph_format }}" alt="Knowledge Graph" class="graph-image">
+                {% endif %}
             </div>
             
             <div class="triples-list">
@@ -139,23 +139,6 @@
 
 // static/js/graph.js
 (function () {
-    const data = GRAPH_DATA || { nodes: [], links: [] };
-
-    if (!data.nodes || data.nodes.length === 0) {
-        // Handle empty graph data gracefully
-        const svg = d3.select("#graph-svg");
-        const width = svg.node().getBoundingClientRect().width;
-        const height = svg.node().getBoundingClientRect().height;
-        svg.append("text")
-            .attr("x", width / 2)
-            .attr("y", height / 2)
-            .attr("text-anchor", "middle")
-            .attr("font-size", "16px")
-            .attr("fill", "#6c757d")
-            .text("No data to display.");
-        return;
-    }
-
     // --- Setup ---
     const svg = d3.select("#graph-svg");
     const width = svg.node().getBoundingClientRect().width;
@@ -181,78 +164,234 @@
     feMerge.append("feMergeNode").attr("in", "SourceGraphic");
 
     // --- Zoom Handler ---
-    const zoom = d3.zoom().scaleExtent([0.1, 8]).on("zoom", (event) => {
+    const zoom = d3.zoom().scaleExtent([0.05, 8]).on("zoom", (event) => {
         g.attr("transform", event.transform);
     });
     svg.call(zoom);
 
-    // --- Simulation ---
-    const simulation = d3.forceSimulation(data.nodes)
-        .force("link", d3.forceLink(data.links).id(d => d.id).distance(120).strength(0.5))
-        .force("charge", d3.forceManyBody().strength(-600))
-        .force("center", d3.forceCenter(width / 2, height / 2).strength(0.1))
-        .force("x", d3.forceX(width / 2).strength(0.05))
-        .force("y", d3.forceY(height / 2).strength(0.05))
-        .force("collide", d3.forceCollide().radius(d => d.size + 5).iterations(2));
-
-    // --- Elements ---
-    const link = g.append("g")
-        .attr("class", "links")
-        .selectAll("line")
-        .data(data.links)
-        .enter().append("line")
-        .attr("class", "link-line");
-
-    const node = g.append("g")
-        .attr("class", "nodes")
-        .selectAll("g")
-        .data(data.nodes)
-        .enter().append("g")
-        .attr("class", "node")
-        .call(d3.drag()
-            .on("start", dragstarted)
-            .on("drag", dragged)
-            .on("end", dragended));
-
-    node.append("circle")
-        .attr("class", "node-circle")
-        .attr("r", d => d.size / 2)
-        .style("filter", "url(#drop-shadow)")
-        .on("dblclick", (event, d) => centerNode(d))
-        .on("click", (event, d) => showInfoPanel(d));
-        
-    node.append("text")
-        .attr("class", "node-label")
-        .attr("dy", d => d.size / 2 + 16)
-        .text(d => d.label);
+    // --- Transport ---
+    // Graphs arrive in the compact format: a string table plus parallel
+    // arrays, with names and labels given as string-table indices.
+    const useMsgpack = typeof MessagePack !== "undefined";
 
-    // --- Info Panel & Tooltip ---
-    const infoPanel = d3.select("#info-panel");
-    d3.select("#close-info").on("click", () => infoPanel.classed("hidden", true));
+    function fetchCompact(url) {
+        const sep = url.includes("?") ? "&" : "?";
+        return fetch(useMsgpack ? `${url}${sep}format=msgpack` : url)
+            .then(response => {
+                if (!response.ok) return Promise.reject(response.status);
+                const type = response.headers.get("Content-Type") || "";
+                if (type.includes("msgpack")) {
+                    return response.arrayBuffer().then(buf => MessagePack.decode(new Uint8Array(buf)));
+                }
+                return response.json();
+            })
+            .then(decodeCompact);
+    }
+
+    function decodeCompact(payload) {
+        const str = payload.strings;
+        const scale = payload.coord_scale;
+        const nodes = payload.nodes.name.map((nameIdx, i) => ({
+            id: str[nameIdx],
+            label: str[nameIdx],
+            degree: payload.nodes.degree[i],
+            size: 12 + payload.nodes.degree[i] * 4,
+            x: payload.nodes.x[i] / scale,
+            y: payload.nodes.y[i] / scale,
+        }));
+        const decodeLinks = cols => cols.source.map((s, i) => ({
+            source: str[s], target: str[cols.target[i]], label: str[cols.label[i]],
+        }));
+        return {
+            graph_id: payload.graph_id,
+            total_nodes: payload.total_nodes,
+            nodes: nodes,
+            links: decodeLinks(payload.links),
+            removed_nodes: (payload.removed_nodes || []).map(i => str[i]),
+            removed_links: payload.removed_links ? decodeLinks(payload.removed_links) : [],
+        };
+    }
+
+    // --- Layout ---
+    // Coordinates are precomputed by the server in [-1, 1]; we only scale them
+    // to the viewport. The scale is fixed by the first payload so that nodes
+    // added later land in the same coordinate system.
+    let layoutScale = null;
+    function project(d) {
+        d.x = width / 2 + d.x * layoutScale;
+        d.y = height / 2 + d.y * layoutScale;
+    }
+
+    // --- State ---
+    let graphId = GRAPH_ID;
+    let totalNodes = 0;
+    const nodesById = new Map();
+    const linksByKey = new Map();
+    const nextOffset = new Map();  // node id -> next neighbour page offset, null when exhausted
+    const PAGE_SIZE = 50;
+
+    const linkLayer = g.append("g").attr("class", "links");
+    const nodeLayer = g.append("g").attr("class", "nodes");
+    let link = linkLayer.selectAll("line");
+    let node = nodeLayer.selectAll("g.node");
+
+    const drag = d3.drag()
+        .on("start", dragstarted)
+        .on("drag", dragged);
+
+    const linkKey = (source, label, target) => `${source}\u0000${label}\u0000${target}`;
+
+    // Applies a payload (a first page, neighbour page or diff) to the drawing.
+    // Existing nodes keep their DOM elements and positions; only the changed
+    // nodes, and links that appear or disappear, touch the DOM.
+    function applyData(payload) {
+        const resized = new Set();
+        (payload.removed_nodes || []).forEach(id => {
+            nodesById.delete(id);
+            nextOffset.delete(id);
+        });
+        (payload.removed_links || []).forEach(l => linksByKey.delete(linkKey(l.source, l.label, l.target)));
+        linksByKey.forEach((l, key) => {
+            if (!nodesById.has(l.source.id) || !nodesById.has(l.target.id)) linksByKey.delete(key);
+        });
+
+        payload.nodes.forEach(n => {
+            const existing = nodesById.get(n.id);
+            if (existing) {
+                if (n.degree !== undefined && existing.degree !== n.degree) {
+                    existing.degree = n.degree;
+                    existing.size = n.size;
+                    resized.add(n.id);
+                    nextOffset.delete(n.id);  // new neighbours may be available
+                }
+                return;
+            }
+            project(n);
+            nodesById.set(n.id, n);
+        });
+        payload.links.forEach(l => {
+            const key = linkKey(l.source, l.label, l.target);
+            if (linksByKey.has(key) || !nodesById.has(l.source) || !nodesById.has(l.target)) return;
+            linksByKey.set(key, { key: key, source: nodesById.get(l.source), target: nodesById.get(l.target), label: l.label });
+        });
+        if (payload.total_nodes !== undefined) totalNodes = payload.total_nodes;
+        render(resized);
+    }
+
+    function render(resized) {
+        link = linkLayer.selectAll("line")
+            .data(Array.from(linksByKey.values()), d => d.key)
+            .join(
+                enter => enter.append("line")
+                    .attr("class", "link-line")
+                    .call(positionLinks),
+                update => update,
+                exit => exit.remove()
+            );
 
-    // --- Tick Function (updates positions) ---
-    simulation.on("tick", () => {
-        link
+        node = nodeLayer.selectAll("g.node")
+            .data(Array.from(nodesById.values()), d => d.id)
+            .join(
+                enter => {
+                    const entered = enter.append("g")
+                        .attr("class", "node")
+                        .attr("transform", d => `translate(${d.x},${d.y})`)
+                        .call(drag);
+                    entered.append("circle")
+                        .attr("class", "node-circle")
+                        .attr("r", d => d.size / 2)
+                        .style("filter", "url(#drop-shadow)")
+                        .on("dblclick", (event, d) => centerNode(d))
+                        .on("click", (event, d) => expandNode(d));
+                    entered.append("text")
+                        .attr("class", "node-label")
+                        .attr("dy", d => d.size / 2 + 16)
+                        .text(d => d.label);
+                    return entered;
+                },
+                update => update,
+                exit => exit.remove()
+            );
+
+        if (resized && resized.size) {
+            const changed = node.filter(d => resized.has(d.id));
+            changed.select("circle").attr("r", d => d.size / 2);
+            changed.select("text").attr("dy", d => d.size / 2 + 16);
+        }
+        d3.select("#graph-status").text(`Showing ${nodesById.size} of ${totalNodes} nodes`);
+    }
+
+    function positionLinks(selection) {
+        selection
             .attr("x1", d => d.source.x)
             .attr("y1", d => d.source.y)
             .attr("x2", d => d.target.x)
             .attr("y2", d => d.target.y);
-        node
-            .attr("transform", d => `translate(${d.x},${d.y})`);
-    });
+    }
+
+    function updatePositions() {
+        link.call(positionLinks);
+        node.attr("transform", d => `translate(${d.x},${d.y})`);
+    }
+
+    // --- Level of detail: fetch neighbourhoods on demand ---
+    function expandNode(d) {
+        showInfoPanel(d);
+        if (!graphId || nextOffset.get(d.id) === null) return;
+        const offset = nextOffset.get(d.id) || 0;
+        const params = new URLSearchParams({ node: d.id, offset: offset, limit: PAGE_SIZE });
+        fetch(`/api/graph/${encodeURIComponent(graphId)}/neighbours?${params}`)
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(page => {
+                if (page.graph_id !== graphId) return;  // graph was extended meanwhile
+                nextOffset.set(d.id, page.next_offset);
+                applyData(page);
+                showInfoPanel(d);
+            })
+            .catch(err => console.warn("Could not load neighbours:", err));
+    }
+
+    // --- Incremental updates: add text to the current graph ---
+    const extendForm = document.getElementById("extend-form");
+    if (extendForm) {
+        extendForm.addEventListener("submit", event => {
+            event.preventDefault();
+            const form = new FormData(extendForm);
+            form.append("top_k", GRAPH_TOP_K);
+            const button = extendForm.querySelector("button");
+            button.disabled = true;
+            d3.select("#graph-status").text("Extracting relationships...");
+            fetch(`/api/graph/${encodeURIComponent(graphId)}/extend`, { method: "POST", body: form })
+                .then(response => response.json().then(body => response.ok ? body : Promise.reject(body.error)))
+                .then(result => fetchCompact(result.diff_url)
+                    // The base graph may have been evicted server-side; reload the new one whole
+                    .catch(() => fetchCompact(`/api/graph/${encodeURIComponent(result.graph_id)}/compact?top_k=${GRAPH_TOP_K}`)
+                        .then(full => { nodesById.clear(); linksByKey.clear(); nextOffset.clear(); return full; })))
+                .then(diff => {
+                    graphId = diff.graph_id;
+                    applyData(diff);
+                    extendForm.reset();
+                })
+                .catch(err => {
+                    console.warn("Could not extend graph:", err);
+                    d3.select("#graph-status").text(typeof err === "string" ? err : "Could not extend the graph.");
+                })
+                .finally(() => { button.disabled = false; });
+        });
+    }
+
+    // --- Info Panel & Tooltip ---
+    const infoPanel = d3.select("#info-panel");
+    d3.select("#close-info").on("click", () => infoPanel.classed("hidden", true));
 
     // --- Helper Functions ---
     function dragstarted(event, d) {
-        if (!event.active) simulation.alphaTarget(0.3).restart();
-        d.fx = d.x;
-        d.fy = d.y;
+        d3.select(this).raise();
     }
     function dragged(event, d) {
-        d.fx = event.x;
-        d.fy = event.y;
-    }
-    function dragended(event, d) {
-        if (!event.active) simulation.alphaTarget(0);
+        d.x = event.x;
+        d.y = event.y;
+        updatePositions();
     }
 
     function centerNode(d) {
@@ -264,7 +403,7 @@
         infoPanel.classed("hidden", false);
         d3.select("#info-title").text(d.label);
 
-        const connected = data.links.filter(l => l.source.id === d.id || l.target.id === d.id);
+        const connected = Array.from(linksByKey.values()).filter(l => l.source.id === d.id || l.target.id === d.id);
         let html = "<ul>";
         connected.forEach(l => {
             const isSource = l.source.id === d.id;
@@ -273,14 +412,44 @@
             html += `<li>${escapeHtml(d.label)} ${relation} ${escapeHtml(otherNode)}</li>`;
         });
         html += "</ul>";
+        if (nextOffset.get(d.id) !== null && connected.length < d.degree) {
+            html += `<p><em>Click the node again to load more neighbours.</em></p>`;
+        }
         d3.select("#info-body").html(html);
     }
 
     function escapeHtml(str) {
         return (str + "").replace(/[&<>"']/g, m => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" }[m]));
     }
-    
-    // Set initial zoom
-    const initialTransform = d3.zoomIdentity.translate(width / 2, height / 2).scale(0.8).translate(-width / 2, -height / 2);
-    svg.call(zoom.transform, initialTransform);
-})();
\ No newline at end of file
+
+    function showEmpty(message) {
+        svg.append("text")
+            .attr("x", width / 2)
+            .attr("y", height / 2)
+            .attr("text-anchor", "middle")
+            .attr("font-size", "16px")
+            .attr("fill", "#6c757d")
+            .text(message);
+    }
+
+    fetchCompact(`/api/graph/${encodeURIComponent(graphId)}/compact?top_k=${GRAPH_TOP_K}`)
+        .then(data => {
+            if (!data.nodes.length) {
+                // Handle empty graph data gracefully
+                showEmpty("No data to display.");
+                return;
+            }
+            // The canvas grows with the graph so nodes keep some room
+            layoutScale = Math.min(width, height) / 2 * Math.max(1, Math.sqrt(data.total_nodes / 200));
+            applyData(data);
+
+            // Set initial zoom so the whole laid-out graph is visible
+            const fit = Math.min(0.8, 0.8 * Math.min(width, height) / (2 * layoutScale + 1));
+            const initialTransform = d3.zoomIdentity.translate(width / 2, height / 2).scale(fit).translate(-width / 2, -height / 2);
+            svg.call(zoom.transform, initialTransform);
+        })
+        .catch(err => {
+            console.warn("Could not load graph:", err);
+            showEmpty("This graph has expired. Please generate it again.");
+        });
+})();
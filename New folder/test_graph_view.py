@@ -0,0 +1,30 @@
+import numpy as np
+
+from graph_view import COORD_SCALE, SPRING_LAYOUT_MAX_NODES, GraphView
+
+
+def _chains(count, length):
+    return [
+        {"subj": f"c{c}n{i}", "pred": "next", "obj": f"c{c}n{i + 1}"}
+        for c in range(count) for i in range(length - 1)
+    ]
+
+
+def _distinct_positions(view):
+    return len(np.unique(np.round(view.positions * COORD_SCALE), axis=0))
+
+
+def test_large_disconnected_graph_gets_distinct_positions():
+    view = GraphView(_chains(600, 5))
+    assert len(view.names) == 3000 > SPRING_LAYOUT_MAX_NODES
+    assert _distinct_positions(view) == len(view.names)
+    assert np.abs(view.positions).max() <= 1
+
+
+def test_large_component_gets_distinct_positions():
+    # One hub with many leaves: leaves are structurally identical
+    triples = [{"subj": "hub", "pred": "has", "obj": f"leaf{i}"} for i in range(SPRING_LAYOUT_MAX_NODES + 500)]
+    triples += _chains(100, 4)
+    view = GraphView(triples)
+    assert _distinct_positions(view) == len(view.names)
+    assert np.abs(view.positions).max() <= 1
@@ -0,0 +1,165 @@
+"""
+Semantic answer cache
+Serves stored answers for questions that paraphrase earlier ones
+"""
+
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+
+def chunk_fingerprint(text: str) -> str:
+    """Content hash used to detect that a source chunk has changed"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class CacheHit(NamedTuple):
+    answer: str
+    chunk_ids: List[int]
+    similarity: float
+    question: str
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000):
+        """
+        Initialize the answer cache
+
+        Args:
+            threshold: Minimum cosine similarity between questions for a hit
+            max_entries: Maximum cached answers; least recently used are dropped
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._entries: Dict[int, Dict] = {}  # entry_id -> entry
+        self._chunk_index: Dict[int, set] = {}  # chunk_id -> entry_ids
+        self._next_id = 0
+        self._matrix = None  # (n, dim) normalized question embeddings
+        self._matrix_ids: List[int] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def lookup(self, embedding, use_graph: bool = True,
+               chunk_hash: Optional[Callable[[int], Optional[str]]] = None) -> Optional[CacheHit]:
+        """
+        Find a cached answer for a question embedding
+
+        Args:
+            embedding: Question embedding
+            use_graph: Only answers produced with the same setting match
+            chunk_hash: Returns the current fingerprint of a chunk (None if gone);
+                entries whose source chunks changed are dropped
+
+        Returns:
+            CacheHit or None
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            matrix = self._get_matrix()
+            if matrix is None:
+                self.misses += 1
+                return None
+            scores = matrix @ query
+            for pos in np.argsort(-scores):
+                score = float(scores[pos])
+                if score < self.threshold:
+                    break
+                entry_id = self._matrix_ids[pos]
+                entry = self._entries[entry_id]
+                if entry['use_graph'] != use_graph:
+                    continue
+                if chunk_hash is not None and any(
+                    chunk_hash(cid) != fp for cid, fp in entry['chunks'].items()
+                ):
+                    self._remove(entry_id)
+                    continue
+                entry['last_used'] = time.monotonic()
+                self.hits += 1
+                return CacheHit(entry['answer'], list(entry['chunks']), score, entry['question'])
+            self.misses += 1
+            return None
+
+    def store(self, question: str, embedding, answer: str, chunk_fingerprints: Dict[int, str],
+              use_graph: bool = True):
+        """
+        Cache an answer
+
+        Answers without source chunks are not cached: entries are only
+        invalidated through their chunks, so nothing would ever expire them.
+
+        Args:
+            question: The question text
+            embedding: Question embedding
+            answer: The generated answer
+            chunk_fingerprints: chunk_id -> fingerprint of the chunks used as sources
+            use_graph: Whether graph context was used
+        """
+        if not chunk_fingerprints:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                'question': question,
+                'embedding': self._normalize(embedding),
+                'answer': answer,
+                'chunks': {int(cid): fp for cid, fp in chunk_fingerprints.items()},
+                'use_graph': use_graph,
+                'last_used': time.monotonic(),
+            }
+            for cid in self._entries[entry_id]['chunks']:
+                self._chunk_index.setdefault(cid, set()).add(entry_id)
+            self._matrix = None
+
+            while len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda e: self._entries[e]['last_used'])
+                self._remove(oldest)
+
+    def invalidate_chunks(self, chunk_ids: Iterable[int]) -> int:
+        """Drop every answer that used any of the given chunks; returns the count"""
+        removed = 0
+        with self._lock:
+            for cid in chunk_ids:
+                for entry_id in list(self._chunk_index.get(int(cid), ())):
+                    self._remove(entry_id)
+                    removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._chunk_index.clear()
+            self._matrix = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for cid in entry['chunks']:
+            ids = self._chunk_index.get(cid)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._chunk_index[cid]
+        self._matrix = None
+
+    def _get_matrix(self) -> Optional[np.ndarray]:
+        if self._matrix is None and self._entries:
+            self._matrix_ids = list(self._entries)
+            self._matrix = np.vstack([self._entries[e]['embedding'] for e in self._matrix_ids])
+        return self._matrix
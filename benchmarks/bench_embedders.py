@@ -0,0 +1,99 @@
+"""
+Throughput and retrieval agreement benchmark for the embedding backends
+Embeds the same corpus with each backend and compares top-k retrieval
+against the sentence-transformers reference
+
+Usage: python benchmarks/bench_embedders.py [--corpus FILE] [--backends B ...] [--batch-size N] [--threads N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedders import EMBEDDING_BACKENDS, create_embedder
+from graphrag_mistral import EMBEDDING_MODEL
+
+WORDS = ("graph retrieval entity relation model language vector index query answer "
+         "document chunk network node edge paris london company research science "
+         "history river mountain city engine protein market policy energy").split()
+
+
+def load_texts(args):
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            words = f.read().split()
+        step = args.chunk_words
+        return [' '.join(words[i:i + step]) for i in range(0, len(words), step)][:args.texts]
+    rng = random.Random(0)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, args.chunk_words)))
+            for _ in range(args.texts)]
+
+
+def top_k(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    docs = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    qs = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = qs @ docs.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="Text file to chunk (default: synthetic text)")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--chunk-words", type=int, default=120)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    texts = load_texts(args)
+    rng = random.Random(1)
+    queries = [' '.join(t.split()[:12]) for t in rng.sample(texts, min(args.queries, len(texts)))]
+    print(f"{len(texts):,} texts, {len(queries)} queries, batch size {args.batch_size}, "
+          f"threads {args.threads or 'default'}")
+
+    reference = None
+    for backend in args.backends:
+        start = time.perf_counter()
+        embedder = create_embedder(backend, EMBEDDING_MODEL, batch_size=args.batch_size,
+                                   num_threads=args.threads)
+        load_s = time.perf_counter() - start
+        embedder.encode(texts[:args.batch_size])  # warm up
+
+        start = time.perf_counter()
+        doc_emb = embedder.encode(texts)
+        ingest_s = time.perf_counter() - start
+
+        latencies = []
+        query_emb = []
+        for query in queries:
+            start = time.perf_counter()
+            query_emb.append(embedder.encode([query])[0])
+            latencies.append(time.perf_counter() - start)
+        query_emb = np.vstack(query_emb)
+        ranked = top_k(doc_emb, query_emb, args.top_k)
+
+        line = (f"  {backend:22s} load {load_s:6.1f}s | {len(texts) / ingest_s:8.1f} texts/s | "
+                f"query p50 {statistics.median(latencies) * 1e3:6.1f} ms")
+        if reference is None:
+            reference = (backend, doc_emb, ranked)
+        else:
+            ref_name, ref_emb, ref_ranked = reference
+            overlap = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(ranked, ref_ranked)])
+            cosine = np.mean(np.sum(doc_emb * ref_emb, axis=1) /
+                             (np.linalg.norm(doc_emb, axis=1) * np.linalg.norm(ref_emb, axis=1)))
+            line += f" | top-{args.top_k} agreement {overlap:.3f} | cosine vs {ref_name} {cosine:.4f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Memory and query benchmark for the knowledge graph backends
+Builds the same random co-occurrence graph in each GraphStore backend
+
+Usage: python benchmarks/bench_graph_store.py [--nodes N] [--edges M]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_store import GRAPH_BACKENDS, create_graph_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    nodes = [(f"entity-{i}", rng.choice(["PERSON", "ORG", "GPE"])) for i in range(args.nodes)]
+    edges = [(nodes[rng.randrange(args.nodes)][0], nodes[rng.randrange(args.nodes)][0]) for _ in range(args.edges)]
+    print(f"Graph: {args.nodes:,} nodes, {args.edges:,} co-occurrences")
+
+    for backend in GRAPH_BACKENDS:
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = create_graph_store(backend)
+        store.build(nodes, edges)
+        build_s = time.perf_counter() - start
+        resident, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        store.degree_centrality()
+        top = store.top_nodes(20)
+        centrality_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for name, _ in nodes[:10_000]:
+            store.neighbors(name, limit=5)
+        neighbors_us = (time.perf_counter() - start) / 10_000 * 1e6
+
+        print(f"  {backend:9s} build {build_s:6.2f}s | {resident / 2**20:8.1f} MiB "
+              f"({resident / max(store.number_of_edges(), 1):5.0f} B/edge) | "
+              f"centrality+top20 {centrality_s * 1000:7.1f} ms | neighbours {neighbors_us:5.1f} us")
+        del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Two-stage retrieval benchmark: bi-encoder top-k versus cross-encoder reranking of a wider pool
+Queries are sentences taken from chunks; a query is a hit when its source
+chunk is in the final top-k. Reports hit rate and added latency per query.
+
+Usage: python benchmarks/bench_reranker.py --corpus FILE [--pool N ...] [--top-k K] [--budget-ms MS]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedders import create_embedder
+from graphrag_mistral import EMBEDDING_MODEL
+from reranker import RERANK_MODEL, CrossEncoderReranker
+from vector_index import ExactSearchIndex
+
+
+def load_chunks(path: str, chunk_words: int):
+    with open(path, 'r', encoding='utf-8') as f:
+        words = f.read().split()
+    return [' '.join(words[i:i + chunk_words]) for i in range(0, len(words), chunk_words)]
+
+
+def make_queries(chunks, count: int, rng: random.Random):
+    queries = []
+    for idx in rng.sample(range(len(chunks)), min(count, len(chunks))):
+        words = chunks[idx].split()
+        start = rng.randrange(max(1, len(words) - 12))
+        queries.append((' '.join(words[start:start + 12]), idx))
+    return queries
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", required=True, help="Text file to chunk")
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--pool", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Reranking time budget (default: none)")
+    parser.add_argument("--model", default=RERANK_MODEL)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.corpus, args.chunk_words)
+    queries = make_queries(chunks, args.queries, random.Random(0))
+    print(f"{len(chunks):,} chunks, {len(queries)} queries, top-{args.top_k}")
+
+    embedder = create_embedder('sentence-transformers', EMBEDDING_MODEL)
+    index = ExactSearchIndex()
+    index.build(embedder.encode(chunks, show_progress_bar=True))
+    query_embeddings = embedder.encode([query for query, _ in queries])
+
+    hits = 0
+    for (query, source), embedding in zip(queries, query_embeddings):
+        hits += source in index.search(embedding, args.top_k)[0]
+    print(f"  {'bi-encoder only':22s} hit rate {hits / len(queries):.3f}")
+
+    for pool in args.pool:
+        reranker = CrossEncoderReranker(args.model, batch_size=args.batch_size, time_budget_ms=args.budget_ms)
+        hits, latencies = 0, []
+        for (query, source), embedding in zip(queries, query_embeddings):
+            indices, scores = index.search(embedding, pool)
+            candidates = [(int(i), float(s), chunks[i]) for i, s in zip(indices, scores)]
+            start = time.perf_counter()
+            reranked = reranker.rerank(query, candidates, args.top_k)
+            latencies.append((time.perf_counter() - start) * 1e3)
+            hits += source in [idx for idx, _, _ in reranked]
+        stats = reranker.stats()
+        print(f"  {f'rerank pool {pool}':22s} hit rate {hits / len(queries):.3f} | "
+              f"rerank p50 {statistics.median(latencies):7.1f} ms, p95 {percentile(latencies, 0.95):7.1f} ms | "
+              f"budget stops {stats['budget_stops']}")
+
+
+if __name__ == "__main__":
+    main()
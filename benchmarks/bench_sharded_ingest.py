@@ -0,0 +1,74 @@
+"""
+Scaling benchmark for sharded ingestion
+Loads the same corpus with 1, 2, 4, 8, ... workers, checks the result matches
+single-process ingest and reports speedup and parallel efficiency
+
+Usage: python benchmarks/bench_sharded_ingest.py [CORPUS_DIR] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graphrag_mistral import GraphRAGSystem
+
+
+def make_corpus(directory, n_files=16, sentences_per_file=2000, seed=0):
+    rng = random.Random(seed)
+    people = ["Alan Turing", "Ada Lovelace", "Grace Hopper", "John von Neumann", "Claude Shannon"]
+    places = ["London", "Princeton", "Cambridge", "New York", "Paris"]
+    orgs = ["IBM", "Bell Labs", "the Royal Society", "Harvard University", "the US Navy"]
+    for i in range(n_files):
+        with open(os.path.join(directory, f"doc_{i:03d}.txt"), "w", encoding="utf-8") as f:
+            for _ in range(sentences_per_file):
+                f.write(f"{rng.choice(people)} worked with {rng.choice(orgs)} in {rng.choice(places)}. ")
+
+
+def same_state(a, b):
+    return (a.entities == b.entities and a.relationships == b.relationships
+            and dict(a.entity_to_chunks) == dict(b.entity_to_chunks)
+            and np.allclose(a.document_embeddings, b.document_embeddings, atol=1e-5))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", nargs="?", help="Directory of .txt files (default: generated corpus)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    api_key = os.getenv("MISTRAL_API_KEY", "unused")
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = tmp
+            make_corpus(corpus)
+
+        baseline, baseline_seconds = None, None
+        rows = []
+        for workers in sorted(set([1] + args.workers)):
+            system = GraphRAGSystem(mistral_api_key=api_key)
+            stats = system.load_sharded(corpus, num_workers=workers,
+                                        chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+            if baseline is None:
+                baseline, baseline_seconds = system, stats['total_seconds']
+                identical = True
+            else:
+                identical = same_state(baseline, system)
+            speedup = baseline_seconds / stats['total_seconds']
+            rows.append((workers, stats['total_seconds'], speedup, speedup / workers, identical))
+
+    print(f"\n{'workers':>7} {'seconds':>9} {'speedup':>8} {'efficiency':>10} {'identical':>9}")
+    for workers, seconds, speedup, efficiency, identical in rows:
+        print(f"{workers:>7} {seconds:>9.2f} {speedup:>7.2f}x {efficiency:>9.0%} {str(identical):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Chunk deduplication
+Maps every chunk to a canonical copy: identical chunks by content hash,
+near-identical ones (boilerplate with a changed date, re-sent emails) by
+MinHash/LSH over word shingles. Only canonical chunks are extracted and
+embedded; duplicates alias them.
+"""
+
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Largest prime below 2**32: (a * x + b) mod p stays within uint64
+_HASH_PRIME = 4294967291
+
+
+class ChunkDeduplicator:
+    def __init__(self, near_threshold: Optional[float] = 0.9, shingle_words: int = 5,
+                 num_perm: int = 64, bands: int = 16, min_words: int = 20):
+        """
+        Initialize the deduplicator
+
+        Args:
+            near_threshold: Estimated word-shingle Jaccard similarity above which a
+                chunk aliases an earlier one (None: exact duplicates only)
+            shingle_words: Words per shingle
+            num_perm: MinHash signature length
+            bands: LSH bands; only chunks sharing a band bucket are compared
+            min_words: Shorter chunks are only deduplicated exactly (a few
+                changed words are most of a short chunk)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.near_threshold = near_threshold
+        self.shingle_words = shingle_words
+        self.num_perm = num_perm
+        self.bands = bands
+        self.min_words = min_words
+
+        rng = np.random.RandomState(11)
+        self._perm_a = rng.randint(1, _HASH_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._perm_b = rng.randint(0, _HASH_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._signatures: Dict[str, np.ndarray] = {}  # fingerprint -> MinHash signature
+
+    def canonical_ids(self, documents: Sequence[str], fingerprints: Sequence[str]) -> List[int]:
+        """
+        Canonical chunk for every chunk
+
+        The canonical copy is the first occurrence, so canonical ids never
+        exceed the chunk's own id and chunks appended later cannot change the
+        mapping of earlier ones.
+
+        Args:
+            documents: Chunk texts
+            fingerprints: Content hashes aligned with documents
+
+        Returns:
+            chunk_idx -> canonical chunk_idx (equal for canonical chunks)
+        """
+        canonical = []
+        first_by_hash: Dict[str, int] = {}
+        rows = self.num_perm // self.bands
+        buckets = defaultdict(list)  # (band, band hash) -> canonical chunks
+        signatures = {}
+        for idx, (text, fingerprint) in enumerate(zip(documents, fingerprints)):
+            first = first_by_hash.get(fingerprint)
+            if first is not None:
+                canonical.append(canonical[first])
+                continue
+            first_by_hash[fingerprint] = idx
+            canonical.append(idx)
+            if self.near_threshold is None:
+                continue
+            words = text.split()
+            if len(words) < self.min_words:
+                continue
+
+            signature = self._signature(fingerprint, words)
+            band_keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+            candidates = sorted({other for key in band_keys for other in buckets.get(key, ())})
+            for other in candidates:
+                if np.mean(signatures[other] == signature) >= self.near_threshold:
+                    canonical[idx] = other
+                    break
+            else:
+                signatures[idx] = signature
+                for key in band_keys:
+                    buckets[key].append(idx)
+
+        # Forget signatures of chunks that are gone
+        live = set(fingerprints)
+        self._signatures = {fp: sig for fp, sig in self._signatures.items() if fp in live}
+        return canonical
+
+    def _signature(self, fingerprint: str, words: List[str]) -> np.ndarray:
+        signature = self._signatures.get(fingerprint)
+        if signature is None:
+            size = self.shingle_words
+            shingles = {' '.join(words[i:i + size]).lower() for i in range(max(len(words) - size + 1, 1))}
+            hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) % _HASH_PRIME for s in shingles),
+                                 dtype=np.uint64, count=len(shingles))
+            # (a * x + b) mod p for every permutation, minimised over shingles
+            values = (np.outer(self._perm_a, hashes) + self._perm_b[:, None]) % np.uint64(_HASH_PRIME)
+            signature = self._signatures[fingerprint] = values.min(axis=1)
+        return signature
+
+
+def dedup_stats(canonical: Sequence[int], fingerprints: Sequence[str]) -> Dict:
+    """Counts of unique, exact-duplicate and near-duplicate chunks"""
+    unique = exact = near = 0
+    for idx, target in enumerate(canonical):
+        if target == idx:
+            unique += 1
+        elif fingerprints[target] == fingerprints[idx]:
+            exact += 1
+        else:
+            near += 1
+    total = len(canonical)
+    return {
+        'chunks': total,
+        'unique': unique,
+        'exact_duplicates': exact,
+        'near_duplicates': near,
+        'dedup_ratio': (exact + near) / total if total else 0.0,
+    }
@@ -0,0 +1,281 @@
+"""
+Graph communities and global question answering
+Detects entity communities in the knowledge graph, keeps a cached LLM
+summary per community and answers corpus-wide questions ("what are the
+main themes?") with a map-reduce over the most relevant summaries
+"""
+
+import hashlib
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+import networkx as nx
+import numpy as np
+
+from context_builder import estimate_tokens
+from vector_index import ExactSearchIndex
+
+COMMUNITY_METHODS = ('louvain', 'label_propagation')
+
+_GLOBAL_QUESTION_RE = re.compile(
+    r"\b(?:main|key|major|overall|common|recurring|central|important)\s+"
+    r"(?:themes?|topics?|ideas?|points?|trends?|subjects?|issues?|findings?)\b"
+    r"|\b(?:summari[sz]e|summary|overview)\b"
+    r"|\bwhat\s+(?:is|are)\s+(?:this|these|the)\s+(?:documents?|texts?|corpus|collection|files?|books?)\s+about\b"
+    r"|\b(?:in general|across (?:all|the) (?:documents|texts|corpus))\b",
+    re.IGNORECASE,
+)
+
+
+def is_global_question(question: str, mentioned_entities: List[str]) -> bool:
+    """True for corpus-wide questions that name no known entity"""
+    return not mentioned_entities and bool(_GLOBAL_QUESTION_RE.search(question))
+
+
+class Community(NamedTuple):
+    id: int
+    key: str  # content hash; the summary cache key
+    members: List[str]  # most connected first
+
+
+class CommunityIndex:
+    def __init__(self, method: str = 'louvain', resolution: float = 1.0, min_size: int = 3,
+                 max_communities: int = 50, seed: int = 42):
+        """
+        Initialize the community index
+
+        Args:
+            method: "louvain" or "label_propagation"
+            resolution: Louvain resolution (higher gives smaller communities)
+            min_size: Smallest community worth summarizing
+            max_communities: Most communities summarized (largest first); bounds
+                the number of LLM calls of a rebuild
+            seed: Random seed, so the same graph gives the same communities
+        """
+        if method not in COMMUNITY_METHODS:
+            raise ValueError(f"Unknown community method '{method}'. Choose from: {', '.join(COMMUNITY_METHODS)}")
+        self.method = method
+        self.resolution = resolution
+        self.min_size = min_size
+        self.max_communities = max_communities
+        self.seed = seed
+
+        self.communities: List[Community] = []
+        self.summaries: Dict[str, Dict[str, str]] = {}  # community key -> {'title', 'summary'}
+        self.stale = True  # set whenever the knowledge graph is rebuilt
+        self._summarized: List[Community] = []  # rows of self._index
+        self._index = ExactSearchIndex()
+
+    def detect(self, system) -> List[Community]:
+        """Partition the knowledge graph into communities, largest first"""
+        graph = system.graph.to_networkx()
+        if graph.number_of_edges() == 0:
+            return []
+        if self.method == 'louvain':
+            parts = nx.community.louvain_communities(graph, weight='weight', resolution=self.resolution,
+                                                     seed=self.seed)
+        else:
+            parts = nx.community.asyn_lpa_communities(graph, weight='weight', seed=self.seed)
+        degree = dict(graph.degree(weight='weight'))
+
+        communities = []
+        for part in parts:
+            if len(part) < self.min_size:
+                continue
+            members = sorted(part, key=lambda name: (-degree[name], name))
+            communities.append(members)
+        communities.sort(key=lambda members: (-len(members), members[0]))
+        return [Community(i, self._community_key(system, members), members)
+                for i, members in enumerate(communities)]
+
+    @staticmethod
+    def _community_key(system, members: List[str]) -> str:
+        # Same members backed by the same chunk contents -> same summary
+        digest = hashlib.sha1()
+        for name in sorted(members):
+            digest.update(name.encode('utf-8') + b'\0')
+        chunk_ids = sorted({idx for name in members for idx in system.entity_to_chunks.get(name, ())})
+        for idx in chunk_ids:
+            digest.update(system.chunk_fingerprints[idx].encode('ascii'))
+        return digest.hexdigest()
+
+    def build(self, system) -> Dict:
+        """
+        Detect communities and summarize each one not already in the cache
+
+        Returns:
+            Build statistics
+        """
+        self.communities = self.detect(system)
+        selected = self.communities[:self.max_communities]
+        summarized = cached = 0
+        for community in selected:
+            if community.key in self.summaries:
+                cached += 1
+                continue
+            summary = self._summarize(system, community)
+            if summary is not None:
+                self.summaries[community.key] = summary
+                summarized += 1
+
+        # Drop summaries of communities that no longer exist
+        live = {community.key for community in self.communities}
+        self.summaries = {key: value for key, value in self.summaries.items() if key in live}
+
+        self._summarized = [community for community in selected if community.key in self.summaries]
+        texts = [self.summary_text(community) for community in self._summarized]
+        self._index.build(np.asarray(system.embedder.encode(texts)) if texts else None)
+        self.stale = False
+
+        stats = {
+            'communities': len(self.communities),
+            'summarized': summarized,
+            'cached': cached,
+            'indexed': len(self._summarized),
+        }
+        print(f"Communities: {stats['communities']} found, {summarized} summarized, {cached} from cache")
+        return stats
+
+    def summary_text(self, community: Community) -> str:
+        summary = self.summaries[community.key]
+        return f"{summary['title']}\n{summary['summary']}"
+
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Community]:
+        """Summarized communities most similar to a question"""
+        indices, _ = self._index.search(query_embedding, top_k)
+        return [self._summarized[i] for i in indices]
+
+    def _describe(self, system, community: Community, token_budget: int = 1200) -> str:
+        members = community.members[:20]
+        lines = ["Entities:"]
+        lines.extend(f"- {name} ({system.entities.get(name, {}).get('type', 'UNKNOWN')})" for name in members)
+
+        subgraph = system.graph.to_networkx(members)
+        edges = sorted(subgraph.edges(data='weight'), key=lambda e: -e[2])[:30]
+        if edges:
+            lines.append("Relationships (co-occurrence counts):")
+            lines.extend(f"- {u} -- {v} ({int(w)})" for u, v, w in edges)
+
+        lines.append("Excerpts:")
+        used_tokens = estimate_tokens("\n".join(lines))
+        seen_chunks = set()
+        for name in members[:8]:
+            for mention in system.entities.get(name, {}).get('mentions', [])[:2]:
+                if mention['chunk_idx'] in seen_chunks:
+                    continue
+                line = f'- "{mention["text"]}"'
+                cost = estimate_tokens(line)
+                if used_tokens + cost > token_budget:
+                    return "\n".join(lines)
+                seen_chunks.add(mention['chunk_idx'])
+                lines.append(line)
+                used_tokens += cost
+        return "\n".join(lines)
+
+    def _summarize(self, system, community: Community) -> Optional[Dict[str, str]]:
+        prompt = f"""The following entities form a closely connected group in a knowledge graph built from a document collection.
+
+{self._describe(system, community)}
+
+Describe what connects this group. Reply in exactly this format:
+Title: <a short title for the theme>
+Summary: <3-5 sentences on the theme, the key entities and how they relate>"""
+        try:
+            response = system.mistral_client.chat.complete(
+                model=system.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2
+            )
+            text = response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Error summarizing community {community.id}: {e}")
+            return None
+        title_match = re.search(r"^\s*Title:\s*(.+)$", text, re.MULTILINE | re.IGNORECASE)
+        summary_match = re.search(r"^\s*Summary:\s*(.+)", text, re.MULTILINE | re.IGNORECASE | re.DOTALL)
+        return {
+            'title': title_match.group(1).strip() if title_match else ", ".join(community.members[:3]),
+            'summary': summary_match.group(1).strip() if summary_match else text,
+        }
+
+
+def answer_global_question(system, question: str, query_embedding: np.ndarray,
+                           max_communities: int = 8) -> Optional[str]:
+    """
+    Answer a corpus-wide question from community summaries
+
+    Map: the most relevant summaries are packed into groups that fit the
+    context budget and each group yields a partial answer. Reduce: partial
+    answers are combined into one. With a single group the map answer is final.
+
+    The community index is built offline by system.build_communities();
+    summarizing communities takes one LLM call each, so it never runs inside
+    a question. Until the index is current, callers fall back to chunk retrieval.
+
+    Returns:
+        The answer, or None if there are no current community summaries to use
+    """
+    index = system.community_index
+    if index.stale:
+        print("Community index not built or out of date (run build_communities()); using chunk retrieval")
+        return None
+    communities = index.search(query_embedding, max_communities)
+    if not communities:
+        return None
+
+    budget = system.context_builder.token_budget
+    groups, current, used = [], [], 0
+    for community in communities:
+        text = f"[Theme: {index.summary_text(community)}]"
+        cost = estimate_tokens(text)
+        if current and used + cost > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += cost
+    if current:
+        groups.append(current)
+    print(f"Global question: {len(communities)} community summaries in {len(groups)} group(s)")
+
+    partials = []
+    for group in groups:
+        prompt = f"""The following are summaries of themes found in a document collection.
+
+{chr(10).join(group)}
+
+Using only these summaries, answer the question. If they contain nothing relevant, reply NONE.
+
+Question: {question}
+
+Answer:"""
+        partial = _complete(system, prompt)
+        if partial and partial.strip().upper() != "NONE":
+            partials.append(partial)
+    if not partials:
+        return "The document collection does not appear to contain information to answer this question."
+    if len(partials) == 1:
+        return partials[0]
+
+    points = "\n\n".join(f"[Partial answer {i + 1}]:\n{p}" for i, p in enumerate(partials))
+    prompt = f"""Several partial answers to a question were written from different parts of a document collection.
+
+{points}
+
+Combine them into one complete, well-organized answer without repeating points.
+
+Question: {question}
+
+Answer:"""
+    return _complete(system, prompt) or "\n\n".join(partials)
+
+
+def _complete(system, prompt: str) -> Optional[str]:
+    try:
+        response = system.mistral_client.chat.complete(
+            model=system.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error generating answer: {e}")
+        return None
@@ -0,0 +1,156 @@
+"""
+Token-aware prompt context builder
+Packs the highest-scoring chunks and graph facts into a fixed token budget
+"""
+
+import math
+import re
+from typing import Dict, List, Sequence, Tuple
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _word_tokens(word: str) -> int:
+    """Approximate BPE token count of a single whitespace-delimited word"""
+    count = 0
+    for piece in _PIECE_RE.findall(word):
+        count += max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() else 1
+    return max(count, 1)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate (no tokenizer download needed)
+
+    Words count roughly one token per four characters, punctuation counts
+    one token each. Close enough to budget prompts for BPE-style models.
+    """
+    return sum(_word_tokens(w) for w in text.split())
+
+
+class ContextBuilder:
+    def __init__(self, token_budget: int = 1500, graph_share: float = 0.25,
+                 min_fragment_tokens: int = 40):
+        """
+        Initialize the context builder
+
+        Args:
+            token_budget: Maximum estimated tokens for chunks plus graph context
+            graph_share: Fraction of the budget graph facts may use; unused
+                graph budget goes to document chunks
+            min_fragment_tokens: Smallest partial chunk worth adding when the
+                next chunk does not fit whole
+        """
+        self.token_budget = token_budget
+        self.graph_share = graph_share
+        self.min_fragment_tokens = min_fragment_tokens
+
+    def build(self, chunks: Sequence[Tuple[int, float, str]], documents: Sequence[str],
+              chunk_overlap: int = 0, graph_lines: Sequence[str] = ()) -> Tuple[str, str, Dict]:
+        """
+        Pack retrieved chunks and graph facts into the token budget
+
+        Args:
+            chunks: (chunk_idx, score, text) candidates, any order
+            documents: All document chunks, used to detect shared overlap words
+            chunk_overlap: Words shared by adjacent chunks
+            graph_lines: Graph context facts, most relevant first
+
+        Returns:
+            (document context, graph context, packing stats)
+        """
+        graph_text, graph_tokens = self._pack_lines(graph_lines, int(self.token_budget * self.graph_share))
+        remaining = self.token_budget - graph_tokens
+
+        selected = {}  # chunk_idx -> (score, words, complete)
+        saved_overlap = 0
+        for idx, score, _ in sorted(chunks, key=lambda c: c[1], reverse=True):
+            words = documents[idx].split()
+            head, tail = 0, len(words)
+            # Adjacent chunks repeat chunk_overlap words; send them only once
+            if chunk_overlap and idx - 1 in selected and self._overlaps(documents, idx - 1, chunk_overlap):
+                head = min(chunk_overlap, tail)
+            if chunk_overlap and idx + 1 in selected and self._overlaps(documents, idx, chunk_overlap):
+                tail = max(head, tail - chunk_overlap)
+            trimmed = len(words) - (tail - head)
+            words = words[head:tail]
+
+            cost = sum(_word_tokens(w) for w in words)
+            if cost <= remaining:
+                selected[idx] = (score, words, True)
+                remaining -= cost
+                saved_overlap += trimmed
+                continue
+            if remaining >= self.min_fragment_tokens:
+                fragment, cost = self._truncate(words, remaining)
+                selected[idx] = (score, fragment, False)
+                remaining -= cost
+                saved_overlap += trimmed
+            break
+
+        context = self._render(selected)
+        stats = {
+            'chunks_considered': len(chunks),
+            'chunks_packed': len(selected),
+            'chunk_ids': sorted(int(i) for i in selected),
+            'overlap_words_removed': saved_overlap,
+            'graph_tokens': graph_tokens,
+            'total_tokens': self.token_budget - remaining,
+        }
+        return context, graph_text, stats
+
+    @staticmethod
+    def _overlaps(documents: Sequence[str], idx: int, chunk_overlap: int) -> bool:
+        """True if chunk idx ends with the words chunk idx+1 starts with"""
+        if idx + 1 >= len(documents):
+            return False
+        prev_words = documents[idx].split()
+        next_words = documents[idx + 1].split()
+        if len(prev_words) < chunk_overlap or len(next_words) < chunk_overlap:
+            return False
+        return prev_words[-chunk_overlap:] == next_words[:chunk_overlap]
+
+    @staticmethod
+    def _truncate(words: List[str], budget: int) -> Tuple[List[str], int]:
+        used = 0
+        for i, word in enumerate(words):
+            cost = _word_tokens(word)
+            if used + cost > budget:
+                return words[:i], used
+            used += cost
+        return words, used
+
+    @staticmethod
+    def _pack_lines(lines: Sequence[str], budget: int) -> Tuple[str, int]:
+        packed, used = [], 0
+        for line in lines:
+            cost = estimate_tokens(line)
+            if used + cost > budget:
+                break
+            packed.append(line)
+            used += cost
+        return "\n".join(packed), used
+
+    @staticmethod
+    def _render(selected: Dict[int, Tuple[float, List[str], bool]]) -> str:
+        # Consecutive whole chunks are merged into one block so the text reads
+        # continuously; blocks are ordered by their best score.
+        blocks = []
+        for idx in sorted(selected):
+            prev = blocks[-1][-1] if blocks else None
+            if prev == idx - 1 and selected[prev][2] and selected[idx][2]:
+                blocks[-1].append(idx)
+            else:
+                blocks.append([idx])
+        blocks.sort(key=lambda b: max(selected[i][0] for i in b), reverse=True)
+
+        parts = []
+        for block in blocks:
+            score = max(selected[i][0] for i in block)
+            text = " ".join(w for i in block for w in selected[i][1])
+            if len(block) == 1:
+                label = f"Document Chunk {block[0] + 1}"
+            else:
+                label = f"Document Chunks {block[0] + 1}-{block[-1] + 1}"
+            parts.append(f"[{label} (relevance: {score:.2f})]:\n{text}")
+        return "\n\n".join(parts)
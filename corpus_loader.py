@@ -0,0 +1,311 @@
+"""
+Incremental directory corpus loader
+Walks a directory of documents, tracks each file in a manifest and only
+re-processes files that were added, changed or deleted since the last sync
+"""
+
+import csv
+import hashlib
+import json
+import os
+import time
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from answer_cache import chunk_fingerprint
+
+MANIFEST_NAME = '.graphrag_manifest.json'
+MANIFEST_VERSION = 1
+
+
+# --- Format readers ---
+
+def _read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+class _HTMLTextExtractor(HTMLParser):
+    _SKIP = {'script', 'style', 'noscript'}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def _read_html(path: str) -> str:
+    parser = _HTMLTextExtractor()
+    parser.feed(_read_text(path))
+    return ' '.join(parser.parts)
+
+
+def _read_json(path: str) -> str:
+    # Concatenate every string value; keys and numbers are rarely useful prose
+    def strings(value):
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from strings(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from strings(item)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return '\n'.join(strings(json.load(f)))
+
+
+def _read_csv(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        return '\n'.join(' '.join(row) for row in csv.reader(f))
+
+
+def _read_pdf(path: str) -> str:
+    from pypdf import PdfReader  # optional dependency
+    return '\n'.join(page.extract_text() or '' for page in PdfReader(path).pages)
+
+
+def _read_docx(path: str) -> str:
+    import docx  # optional dependency (python-docx)
+    return '\n'.join(p.text for p in docx.Document(path).paragraphs)
+
+
+READERS: Dict[str, Callable[[str], str]] = {
+    '.txt': _read_text,
+    '.md': _read_text,
+    '.rst': _read_text,
+    '.html': _read_html,
+    '.htm': _read_html,
+    '.json': _read_json,
+    '.csv': _read_csv,
+    '.pdf': _read_pdf,
+    '.docx': _read_docx,
+}
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CorpusLoader:
+    def __init__(self, system, directory: str, manifest_path: Optional[str] = None,
+                 chunk_size: int = 500, chunk_overlap: int = 50):
+        """
+        Initialize the corpus loader
+
+        Args:
+            system: GraphRAGSystem to keep in sync with the directory
+            directory: Root directory of the corpus
+            manifest_path: Where to keep the manifest (default: <directory>/.graphrag_manifest.json)
+            chunk_size: Size of each text chunk
+            chunk_overlap: Overlap between chunks
+        """
+        self.system = system
+        self.directory = os.path.abspath(directory)
+        self.manifest_path = manifest_path or os.path.join(self.directory, MANIFEST_NAME)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def scan(self) -> List[str]:
+        """Supported files under the directory (relative paths, sorted, hidden entries skipped)"""
+        found = []
+        for root, dirs, names in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(names):
+                if name.startswith('.') or os.path.splitext(name)[1].lower() not in READERS:
+                    continue
+                found.append(os.path.relpath(os.path.join(root, name), self.directory))
+        return found
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}}
+        settings = manifest.get('settings', {})
+        if (manifest.get('version') != MANIFEST_VERSION
+                or settings.get('chunk_size') != self.chunk_size
+                or settings.get('chunk_overlap') != self.chunk_overlap):
+            return {'files': {}}
+        return manifest
+
+    def _save_manifest(self, files: Dict):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'settings': {'chunk_size': self.chunk_size, 'chunk_overlap': self.chunk_overlap},
+            'files': files,
+        }
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def sync(self) -> Dict:
+        """
+        Bring the system in line with the directory
+
+        Unchanged files (same size and mtime, or same content hash) are skipped.
+        Chunks, embeddings and graph edges of changed and deleted files are
+        removed; added and changed files are chunked, extracted and embedded.
+
+        Returns:
+            Sync statistics
+        """
+        started = time.perf_counter()
+        system = self.system
+        old_files = self._load_manifest()['files']
+        loaded_sources = set(source for source in system.chunk_sources if source is not None)
+        # A different overlap changes every chunk: all loaded files count as changed
+        rechunk = system.chunk_overlap != self.chunk_overlap and bool(system.documents)
+
+        new_files, added, changed, unchanged = {}, [], [], []
+        for rel_path in self.scan():
+            full_path = os.path.join(self.directory, rel_path)
+            stat = os.stat(full_path)
+            entry = old_files.get(rel_path)
+            # A manifest entry only counts if this system actually holds the file's chunks
+            known = not rechunk and entry is not None and (rel_path in loaded_sources or entry.get('chunks') == 0)
+            if known and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                new_files[rel_path] = entry
+                unchanged.append(rel_path)
+                continue
+            digest = _file_hash(full_path)
+            if known and entry['sha256'] == digest:
+                new_files[rel_path] = {**entry, 'size': stat.st_size, 'mtime': stat.st_mtime}
+                unchanged.append(rel_path)
+                continue
+            new_files[rel_path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest}
+            (changed if rel_path in loaded_sources else added).append(rel_path)
+
+        deleted = sorted(loaded_sources - set(new_files))
+        stale = set(changed) | set(deleted)
+        # Chunks from a different origin (e.g. load_text_file) are replaced by the corpus
+        keep = [source in new_files and source not in stale for source in system.chunk_sources]
+        removed = keep.count(False)
+
+        texts = {}
+        for rel_path in added + changed:
+            try:
+                texts[rel_path] = READERS[os.path.splitext(rel_path)[1].lower()](os.path.join(self.directory, rel_path))
+            except ImportError as e:
+                print(f"Skipping {rel_path}: optional reader dependency missing ({e.name})")
+                new_files.pop(rel_path)
+            except (OSError, ValueError, UnicodeDecodeError) as e:
+                print(f"Skipping {rel_path}: {e}")
+                new_files.pop(rel_path)
+
+        if not texts and not removed:
+            self._save_manifest(new_files)
+            return self._stats(added, changed, deleted, unchanged, 0, 0, started)
+
+        self._remove_chunks(keep)
+
+        # Chunk, extract and embed only the new text
+        new_chunks, new_sources = [], []
+        for rel_path, text in texts.items():
+            chunks = system._chunk_text(text, self.chunk_size, self.chunk_overlap)
+            new_chunks.extend(chunks)
+            new_sources.extend([rel_path] * len(chunks))
+            new_files[rel_path]['chunks'] = len(chunks)
+        self._append_chunks(new_chunks, new_sources)
+        # New chunks, and duplicates promoted to canonical because their original was removed
+        pending = [idx for idx in system._unique_chunks() if system.chunk_extractions[idx] is None]
+        if pending:
+            system._process_documents(pending)
+        else:
+            system._rebuild_entity_tables()
+
+        self._save_manifest(new_files)
+        stats = self._stats(added, changed, deleted, unchanged, len(new_chunks), removed, started)
+        print(f"Corpus sync: {len(added)} added, {len(changed)} changed, {len(deleted)} deleted, "
+              f"{len(unchanged)} unchanged ({stats['seconds']:.1f}s)")
+        return stats
+
+    def _remove_chunks(self, keep: List[bool]):
+        """Drop chunks (and their embeddings and extractions) where keep is False"""
+        system = self.system
+        if all(keep):
+            return
+        removed_ids = [idx for idx, kept in enumerate(keep) if not kept]
+        if system.answer_cache is not None:
+            system.answer_cache.invalidate_chunks(removed_ids)
+        system.documents = [c for c, kept in zip(system.documents, keep) if kept]
+        system.chunk_fingerprints = [c for c, kept in zip(system.chunk_fingerprints, keep) if kept]
+        system.chunk_extractions = [c for c, kept in zip(system.chunk_extractions, keep) if kept]
+        system.chunk_sources = [c for c, kept in zip(system.chunk_sources, keep) if kept]
+        if system.document_embeddings is not None:
+            system.document_embeddings = system.document_embeddings[np.asarray(keep, dtype=bool)]
+
+    def _append_chunks(self, chunks: List[str], sources: List[str]):
+        system = self.system
+        system.chunk_overlap = self.chunk_overlap
+        system.documents.extend(chunks)
+        system.chunk_fingerprints.extend(chunk_fingerprint(chunk) for chunk in chunks)
+        system.chunk_extractions.extend([None] * len(chunks))
+        system.chunk_sources.extend(sources)
+        first_new = len(system.documents) - len(chunks)
+        system._dedup_chunks()
+        self._reembed_promoted(first_new)
+        if chunks:
+            # Chunks duplicating already loaded text reuse their embedding
+            embeddings = system._embed_chunks(first_new)
+            if system.document_embeddings is None or len(system.document_embeddings) == 0:
+                system.document_embeddings = embeddings
+            else:
+                system.document_embeddings = np.vstack([system.document_embeddings, embeddings])
+
+    def _reembed_promoted(self, first_new: int):
+        """
+        Encode loaded chunks promoted to canonical because their original was removed
+
+        A near duplicate held a copy of its original's embedding; the promoted
+        chunk's own row replaces it, for the chunk and its loaded aliases.
+        """
+        system = self.system
+        embeddings = system.document_embeddings
+        if embeddings is None or len(embeddings) != first_new:
+            return
+        # Promoted chunks are canonical but not yet extracted (duplicates drop their extractions)
+        promoted = [idx for idx in system._unique_chunks(range(first_new)) if system.chunk_extractions[idx] is None]
+        if not promoted:
+            return
+        encoded = np.asarray(system.embedder.encode([system.documents[idx] for idx in promoted],
+                                                    show_progress_bar=len(promoted) > 100))
+        embeddings = np.array(embeddings)
+        for idx, row in zip(promoted, encoded):
+            for alias in system.chunk_aliases(idx):
+                if alias < first_new:
+                    embeddings[alias] = row
+        system.document_embeddings = embeddings
+
+    @staticmethod
+    def _stats(added, changed, deleted, unchanged, chunks_added, chunks_removed, started) -> Dict:
+        return {
+            'added': len(added),
+            'changed': len(changed),
+            'deleted': len(deleted),
+            'unchanged': len(unchanged),
+            'chunks_added': chunks_added,
+            'chunks_removed': chunks_removed,
+            'seconds': time.perf_counter() - started,
+        }
@@ -0,0 +1,211 @@
+"""
+Sentence embedding backends
+Plain sentence-transformers (PyTorch), an ONNX Runtime export of the same
+model and a dynamically int8-quantized ONNX model behind one encode() call
+"""
+
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+ONNX_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'graphrag', 'onnx')
+
+
+def hub_model_id(model_name: str) -> str:
+    """Hugging Face id for a sentence-transformers short name ('all-MiniLM-L6-v2')"""
+    if '/' in model_name or os.path.isdir(model_name):
+        return model_name
+    return f"sentence-transformers/{model_name}"
+
+
+class Embedder(ABC):
+    """Encodes texts to float32 vectors; encode() matches SentenceTransformer.encode"""
+
+    def __init__(self, model_name: str, batch_size: int = 32, num_threads: Optional[int] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+
+    @property
+    def backend(self) -> str:
+        return type(self).__name__
+
+    @abstractmethod
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts"""
+
+    def encode(self, texts: Union[str, Sequence[str]], show_progress_bar: bool = False,
+               batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        """
+        Embed texts
+
+        Args:
+            texts: A text or list of texts
+            show_progress_bar: Show a tqdm progress bar over batches
+            batch_size: Texts per forward pass (default: the embedder's batch_size)
+
+        Returns:
+            (n, dim) float32 array in input order
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        batch_size = batch_size or self.batch_size
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Longest first so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        starts = range(0, len(order), batch_size)
+        if show_progress_bar:
+            try:
+                from tqdm import tqdm
+                starts = tqdm(starts, desc="Batches")
+            except ImportError:
+                pass
+        out = None
+        for start in starts:
+            batch = order[start:start + batch_size]
+            vectors = self._encode_batch([texts[i] for i in batch])
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[batch] = vectors
+        return out
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """The sentence-transformers model running on PyTorch"""
+
+    def __init__(self, model_name: str, batch_size: int = 32, num_threads: Optional[int] = None,
+                 device: str = 'cpu'):
+        super().__init__(model_name, batch_size, num_threads)
+        from sentence_transformers import SentenceTransformer
+        if num_threads:
+            try:
+                import torch
+                torch.set_num_threads(num_threads)  # process-wide
+            except ImportError:
+                pass
+        self.model = SentenceTransformer(model_name, device=device)
+
+    @property
+    def backend(self) -> str:
+        return 'sentence-transformers'
+
+    def _encode_batch(self, texts):
+        return self.encode(texts)
+
+    def encode(self, texts, show_progress_bar=False, batch_size=None, **kwargs):
+        # sentence-transformers already sorts by length and batches
+        embeddings = self.model.encode(texts, batch_size=batch_size or self.batch_size,
+                                       show_progress_bar=show_progress_bar, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class ONNXEmbedder(Embedder):
+    """
+    The same transformer exported to ONNX and run with ONNX Runtime on CPU
+
+    The export (and the int8 quantization) is done once and cached under
+    ~/.cache/graphrag/onnx. Pooling is mean pooling over the attention mask,
+    followed by L2 normalization, as in the all-MiniLM/all-mpnet models.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, num_threads: Optional[int] = None,
+                 quantize: bool = False, normalize: bool = True, max_seq_length: int = 256,
+                 cache_dir: str = ONNX_CACHE_DIR):
+        super().__init__(model_name, batch_size, num_threads)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.quantize = quantize
+        self.normalize = normalize
+        self.max_seq_length = max_seq_length
+        model_id = hub_model_id(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self.model_path = self._prepare_model(model_id, cache_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    @property
+    def backend(self) -> str:
+        return 'onnx-int8' if self.quantize else 'onnx'
+
+    def _prepare_model(self, model_id: str, cache_dir: str) -> str:
+        base = os.path.join(cache_dir, model_id.replace('/', '__'))
+        fp32_path = base + '.onnx'
+        if not os.path.exists(fp32_path):
+            self._atomic_write(fp32_path, lambda tmp: _export_onnx(model_id, tmp))
+        if not self.quantize:
+            return fp32_path
+        int8_path = base + '.int8.onnx'
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            self._atomic_write(int8_path, lambda tmp: quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8))
+        return int8_path
+
+    @staticmethod
+    def _atomic_write(path: str, write: Callable[[str], None]):
+        # Concurrent workers may export the same model; the first finished file wins
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.onnx', dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _encode_batch(self, texts):
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length,
+                                 return_tensors='np')
+        feed = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+        hidden = self.session.run(None, feed)[0]
+        mask = encoded['attention_mask'][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+
+def _export_onnx(model_id: str, path: str):
+    """Export a Hugging Face encoder's last hidden state to ONNX with dynamic batch and length"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModel.from_pretrained(model_id).eval()
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic = {name: {0: 'batch', 1: 'sequence'} for name in names}
+    dynamic['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(sample[name] for name in names), path,
+                          input_names=names, output_names=['last_hidden_state'],
+                          dynamic_axes=dynamic, opset_version=14)
+
+
+EMBEDDING_BACKENDS: Dict[str, Callable[..., Embedder]] = {
+    'sentence-transformers': SentenceTransformerEmbedder,
+    'onnx': ONNXEmbedder,
+    'onnx-int8': partial(ONNXEmbedder, quantize=True),
+}
+
+
+def create_embedder(backend: str, model_name: str, batch_size: int = 32,
+                    num_threads: Optional[int] = None) -> Embedder:
+    """Create an embedder for the named backend"""
+    try:
+        factory = EMBEDDING_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Choose from: {', '.join(EMBEDDING_BACKENDS)}")
+    return factory(model_name, batch_size=batch_size, num_threads=num_threads)
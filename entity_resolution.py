@@ -0,0 +1,245 @@
+"""
+Entity canonicalization
+Maps surface forms ("Apple", "Apple Inc.", "apple") to one canonical entity
+name through a shared alias table, with optional fuzzy clustering
+"""
+
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+_LEADING_ARTICLE_RE = re.compile(r"^(?:the|a|an)\s+")
+
+DEFAULT_SUFFIXES = frozenset({
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company',
+    'ltd', 'limited', 'llc', 'plc', 'gmbh', 'ag', 'sa',
+})
+
+# Largest prime below 2**32: (a * x + b) mod p stays within uint64
+_HASH_PRIME = 4294967291
+
+
+def normalize_entity(name: str, suffixes: Iterable[str] = DEFAULT_SUFFIXES) -> str:
+    """
+    Normalization key for an entity name
+
+    Folds case and Unicode accents, drops punctuation, collapses whitespace,
+    and strips a leading article and trailing company suffixes.
+    """
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = _SPACE_RE.sub(' ', _PUNCT_RE.sub(' ', text)).strip()
+    text = _LEADING_ARTICLE_RE.sub('', text)
+    words = text.split(' ')
+    while len(words) > 1 and words[-1] in suffixes:
+        words.pop()
+    return ' '.join(words)
+
+
+class EntityCanonicalizer:
+    def __init__(self, fuzzy_threshold: Optional[float] = None, ngram: int = 3,
+                 num_perm: int = 64, bands: int = 16,
+                 embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 embedding_threshold: float = 0.9, suffixes: Iterable[str] = DEFAULT_SUFFIXES):
+        """
+        Initialize the canonicalizer
+
+        Args:
+            fuzzy_threshold: Character n-gram Jaccard similarity above which two
+                normalized names are merged by resolve() (None: exact keys only)
+            ngram: Character n-gram size for fuzzy matching
+            num_perm: MinHash signature length
+            bands: LSH bands; only names sharing a band bucket are compared
+            embed_fn: Optional function embedding a list of names; candidate pairs
+                with cosine similarity >= embedding_threshold are also merged
+            embedding_threshold: Cosine similarity for embedding-based merges
+            suffixes: Trailing words ignored when normalizing (company suffixes)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.fuzzy_threshold = fuzzy_threshold
+        self.ngram = ngram
+        self.num_perm = num_perm
+        self.bands = bands
+        self.embed_fn = embed_fn
+        self.embedding_threshold = embedding_threshold
+        self.suffixes = frozenset(suffixes)
+
+        self._display: Dict[str, str] = {}            # root key -> canonical name
+        self._parent: Dict[str, str] = {}             # key -> parent key (union-find)
+        self._surfaces: Dict[str, Counter] = {}       # key -> surface form counts
+        self._first_seen: Dict[str, int] = {}         # surface form -> order of appearance
+        self._max_words = 1
+
+        rng = np.random.RandomState(7)
+        self._perm_a = rng.randint(1, _HASH_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._perm_b = rng.randint(0, _HASH_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    # --- Alias table ---
+
+    def normalize(self, name: str) -> str:
+        return normalize_entity(name, self.suffixes)
+
+    def canonical(self, name: str) -> str:
+        """Canonical name for a surface form, registering it if new"""
+        surface = _SPACE_RE.sub(' ', name).strip()
+        key = self.normalize(surface)
+        if not key:
+            return surface
+        if key not in self._parent:
+            self._parent[key] = key
+            self._display[key] = surface
+            self._surfaces[key] = Counter()
+            self._max_words = max(self._max_words, key.count(' ') + 1)
+        self._surfaces[key][surface] += 1
+        self._first_seen.setdefault(surface, len(self._first_seen))
+        return self._display[self._find(key)]
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Canonical name for a surface form, or None if it was never seen"""
+        key = self.normalize(name)
+        if key not in self._parent:
+            return None
+        return self._display[self._find(key)]
+
+    def aliases(self) -> Dict[str, str]:
+        """Alias table: every seen surface form -> canonical name"""
+        table = {}
+        for key, surfaces in self._surfaces.items():
+            canonical = self._display[self._find(key)]
+            for surface in surfaces:
+                table[surface] = canonical
+        return table
+
+    def find_in_text(self, text: str) -> List[str]:
+        """
+        Canonical entities mentioned in a text (e.g. a query)
+
+        Looks up every word n-gram of the normalized text in the alias table,
+        so the cost depends on the text length, not the number of entities.
+        """
+        words = self.normalize(text).split()
+        found, seen = [], set()
+        for size in range(min(self._max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                key = ' '.join(words[start:start + size])
+                if key in self._parent:
+                    canonical = self._display[self._find(key)]
+                    if canonical not in seen:
+                        seen.add(canonical)
+                        found.append(canonical)
+        return found
+
+    def _find(self, key: str) -> str:
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[key] != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    # --- Clustering ---
+
+    def resolve(self) -> Dict[str, str]:
+        """
+        Merge near-duplicate names and pick final canonical names
+
+        Runs MinHash/LSH-blocked fuzzy matching (if enabled), then names each
+        cluster after its most frequent surface form.
+
+        Returns:
+            Mapping of previous canonical name -> new canonical name, for every
+            name that changed
+        """
+        keys = list(self._parent)
+        before = {key: self._display[self._find(key)] for key in keys}
+
+        if self.fuzzy_threshold is not None or self.embed_fn is not None:
+            for a, b in self._candidate_pairs(keys):
+                if self._find(a) != self._find(b) and self._similar(a, b):
+                    self._union(a, b)
+
+        members = defaultdict(list)
+        for key in keys:
+            members[self._find(key)].append(key)
+        self._display = {}
+        for root, cluster in members.items():
+            counts = Counter()
+            for key in cluster:
+                counts.update(self._surfaces[key])
+            self._display[root] = min(counts, key=lambda s: (-counts[s], self._first_seen[s]))
+
+        renames = {}
+        for key in keys:
+            after = self._display[self._find(key)]
+            if before[key] != after:
+                renames[before[key]] = after
+        return renames
+
+    def _union(self, a: str, b: str):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self._parent[rb] = ra
+
+    def _shingles(self, key: str) -> set:
+        padded = f" {key} "
+        if len(padded) <= self.ngram:
+            return {padded}
+        return {padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)}
+
+    def _minhash(self, shingles: set) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) % _HASH_PRIME for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p for every permutation, minimised over shingles
+        values = (np.outer(self._perm_a, hashes) + self._perm_b[:, None]) % np.uint64(_HASH_PRIME)
+        return values.min(axis=1)
+
+    def _candidate_pairs(self, keys: Sequence[str]):
+        rows = self.num_perm // self.bands
+        buckets = defaultdict(list)
+        for key in keys:
+            signature = self._minhash(self._shingles(key))
+            for band in range(self.bands):
+                buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(key)
+        seen = set()
+        for bucket in buckets.values():
+            for i in range(len(bucket)):
+                for j in range(i + 1, len(bucket)):
+                    pair = (bucket[i], bucket[j])
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
+    def _similar(self, a: str, b: str) -> bool:
+        if self.fuzzy_threshold is not None:
+            sa, sb = self._shingles(a), self._shingles(b)
+            if len(sa & sb) / len(sa | sb) >= self.fuzzy_threshold:
+                return True
+        if self.embed_fn is not None:
+            vectors = np.asarray(self.embed_fn([self._display[self._find(a)], self._display[self._find(b)]]),
+                                 dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1)
+            if norms.all() and float(vectors[0] @ vectors[1]) / float(norms[0] * norms[1]) >= self.embedding_threshold:
+                return True
+        return False
+
+
+def canonicalize_triples(triples: Iterable[Dict], canonicalizer: Optional[EntityCanonicalizer] = None) -> List[Dict]:
+    """Rewrite subj/obj of each triple to canonical entity names"""
+    canonicalizer = canonicalizer or EntityCanonicalizer()
+    staged = []
+    for t in triples:
+        if not all(k in t for k in ('subj', 'pred', 'obj')):
+            continue
+        staged.append((canonicalizer.canonical(str(t['subj'])), t, canonicalizer.canonical(str(t['obj']))))
+    renames = canonicalizer.resolve()
+    return [
+        {**t, 'subj': renames.get(subj, subj), 'obj': renames.get(obj, obj)}
+        for subj, t, obj in staged
+    ]
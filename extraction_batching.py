@@ -0,0 +1,164 @@
+"""
+Token-budgeted batching for LLM entity extraction
+Packs whole chunks into as few requests as fit the model's context window
+and parses entities and relations attributed to each chunk of a batch
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from context_builder import estimate_tokens
+
+# Context windows (tokens) by model name prefix; unknown models get the default
+MODEL_CONTEXT_TOKENS = {
+    'mistral-large': 128000,
+    'mistral-medium': 128000,
+    'mistral-small': 32000,
+    'ministral': 128000,
+    'open-mistral-nemo': 128000,
+    'open-mistral-7b': 32000,
+    'open-mixtral-8x22b': 64000,
+    'open-mixtral-8x7b': 32000,
+}
+DEFAULT_CONTEXT_TOKENS = 32000
+
+# Share of the context window left for the instructions and the JSON reply
+_REPLY_SHARE = 0.5
+_CHUNK_HEADER_TOKENS = 6
+
+_FENCE_RE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_CONTEXT_ERROR_RE = re.compile(
+    r"context (?:length|window)|too (?:long|large|many tokens)|max(?:imum)?[ _]tokens|token limit",
+    re.IGNORECASE,
+)
+
+_PROMPT = """Extract all important entities (people, places, organizations, concepts) from each of the following text chunks,
+and the relations each chunk states between them as subject-predicate-object triples (predicate: a short verb phrase).
+Report every chunk separately, using its number, and only what that chunk itself says.
+Return a JSON object. Format:
+{{"chunks": [{{"chunk": 0,
+  "entities": [{{"entity": "EntityName", "type": "PERSON|ORG|LOC|CONCEPT"}}],
+  "relations": [{{"subject": "EntityName", "predicate": "founded", "object": "EntityName"}}]}}]}}
+
+Text:
+{chunks}
+
+JSON:"""
+
+# Entities and relations found in one chunk
+ChunkResult = Tuple[List[Dict], List[Dict]]
+
+
+def context_window(model: str) -> int:
+    """Context window of a Mistral model in tokens"""
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_TOKENS
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)]
+
+
+def input_token_budget(model: str, token_budget: Optional[int] = None) -> int:
+    """Chunk tokens per request: the configured budget, capped by what the model's window can hold"""
+    limit = int(context_window(model) * (1 - _REPLY_SHARE)) - estimate_tokens(_PROMPT)
+    return max(1, min(token_budget, limit) if token_budget else limit)
+
+
+def pack_batches(texts: Sequence[str], token_budget: int, max_chunks: int) -> List[List[int]]:
+    """
+    Group consecutive texts into batches within a token budget
+
+    Texts are never cut: one longer than the budget gets a batch of its own.
+
+    Returns:
+        Batches of positions in texts
+    """
+    batches, current, used = [], [], 0
+    for pos, text in enumerate(texts):
+        cost = estimate_tokens(text) + _CHUNK_HEADER_TOKENS
+        if current and (used + cost > token_budget or len(current) >= max_chunks):
+            batches.append(current)
+            current, used = [], 0
+        current.append(pos)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+class ExtractionReplyError(ValueError):
+    """An extraction reply that could not be parsed"""
+
+
+def is_batch_size_error(error: Exception) -> bool:
+    """True for failures a smaller batch can fix: unparseable replies and over-long requests"""
+    if isinstance(error, ValueError):  # includes json.JSONDecodeError
+        return True
+    return getattr(error, 'status_code', None) == 413 or bool(_CONTEXT_ERROR_RE.search(str(error)))
+
+
+def build_extraction_prompt(texts: Sequence[str]) -> str:
+    return _PROMPT.format(chunks="\n\n".join(f"[Chunk {j}]\n{text}" for j, text in enumerate(texts)))
+
+
+def parse_extraction_response(result: str, texts: Sequence[str]) -> Optional[List[ChunkResult]]:
+    """
+    Per-chunk entities and relations from an extraction reply
+
+    Besides the per-chunk format, accepts a single {"entities", "relations"}
+    object or a bare entity list for the whole batch; those are attributed to
+    the chunks that mention each entity (or relation subject).
+
+    Returns:
+        (entities, relations) for each text, or None if the reply holds no JSON
+    """
+    data = _load_json(result)
+    if isinstance(data, list):
+        data = {'entities': data}
+    if not isinstance(data, dict):
+        return None
+
+    results: List[ChunkResult] = [([], []) for _ in texts]
+    if 'chunks' in data:
+        for entry in _dicts(data['chunks']):
+            try:
+                pos = int(entry.get('chunk'))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= pos < len(texts):
+                results[pos][0].extend(_dicts(entry.get('entities')))
+                results[pos][1].extend(_dicts(entry.get('relations')))
+        return results
+
+    # Batch-level reply: attribute by mention
+    folded = [text.casefold() for text in texts]
+    def mentioned_in(name: str) -> List[int]:
+        return [pos for pos, text in enumerate(folded) if name and name.casefold() in text]
+    for entity in _dicts(data.get('entities')):
+        for pos in mentioned_in(str(entity.get('entity', '')).strip()) or range(len(texts)):
+            results[pos][0].append(entity)
+    for relation in _dicts(data.get('relations')):
+        for pos in mentioned_in(str(relation.get('subject', '')).strip()) or [0]:
+            results[pos][1].append(relation)
+    return results
+
+
+def _load_json(text: str):
+    """The JSON object or array in a reply, ignoring code fences and surrounding prose"""
+    text = _FENCE_RE.sub('', text).strip()
+    patterns = [r'\{.*\}', r'\[.*\]']
+    if text.startswith('['):
+        patterns.reverse()
+    for pattern in patterns:
+        match = re.search(pattern, text, re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group())
+            except json.JSONDecodeError:
+                continue
+    return None
+
+
+def _dicts(items) -> List[Dict]:
+    """The dict entries of a reply list (models sometimes return bare strings)"""
+    return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
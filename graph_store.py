@@ -0,0 +1,263 @@
+"""
+Knowledge graph storage backends
+A compact CSR (NumPy) store for large graphs, and a networkx store
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+
+class GraphStore(ABC):
+    """Undirected, weighted entity graph with string node names"""
+
+    @abstractmethod
+    def build(self, nodes: Iterable[Tuple[str, str]], edges: Iterable[Tuple[str, str]]):
+        """
+        Replace the graph contents
+
+        Args:
+            nodes: (name, type) pairs
+            edges: (name1, name2) pairs; repeated pairs add to the edge weight,
+                pairs with an unknown endpoint or a self-loop are ignored
+        """
+
+    @abstractmethod
+    def __contains__(self, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def number_of_nodes(self) -> int:
+        ...
+
+    @abstractmethod
+    def number_of_edges(self) -> int:
+        ...
+
+    @abstractmethod
+    def node_names(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def node_type(self, name: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def neighbors(self, name: str, limit: Optional[int] = None) -> List[str]:
+        """Neighbors of a node, heaviest edge first, so limit keeps the strongest links"""
+
+    @abstractmethod
+    def degrees(self) -> np.ndarray:
+        """Degree of every node, aligned with node_names()"""
+
+    @abstractmethod
+    def to_networkx(self, nodes: Optional[Iterable[str]] = None) -> nx.Graph:
+        """Export the graph (or the subgraph induced by nodes) as networkx"""
+
+    def __len__(self) -> int:
+        return self.number_of_nodes()
+
+    def degree_centrality(self) -> np.ndarray:
+        """Degree centrality of every node, aligned with node_names()"""
+        n = self.number_of_nodes()
+        if n <= 1:
+            return np.ones(n, dtype=np.float64)
+        return self.degrees() / (n - 1)
+
+    def top_nodes(self, n: int) -> List[str]:
+        """The n most connected nodes, highest degree first"""
+        degrees = self.degrees()
+        if n <= 0 or len(degrees) == 0:
+            return []
+        n = min(n, len(degrees))
+        top = np.argpartition(-degrees, n - 1)[:n]
+        top = top[np.lexsort((top, -degrees[top]))]
+        names = self.node_names()
+        return [names[i] for i in top]
+
+
+class CSRGraphStore(GraphStore):
+    """
+    Array-backed graph in compressed sparse row form
+
+    Nodes are integer IDs with a name table; each undirected edge is stored
+    in both directions in `indices`/`weights`, sliced per node by `indptr`.
+    Uses a few dozen bytes per edge instead of networkx's dict-of-dicts.
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._type_names: List[str] = []
+        self._types = np.zeros(0, dtype=np.int16)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+
+    def build(self, nodes, edges):
+        self._names, self._ids = [], {}
+        type_codes: Dict[str, int] = {}
+        types = []
+        for name, node_type in nodes:
+            if name in self._ids:
+                continue
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+            types.append(type_codes.setdefault(node_type, len(type_codes)))
+        self._type_names = list(type_codes)
+        self._types = np.asarray(types, dtype=np.int16)
+
+        n = len(self._names)
+        src, dst = [], []
+        ids = self._ids
+        for u, v in edges:
+            i, j = ids.get(u), ids.get(v)
+            if i is None or j is None or i == j:
+                continue
+            src.append(i)
+            dst.append(j)
+        self._build_csr(n, np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64))
+
+    def _build_csr(self, n: int, src: np.ndarray, dst: np.ndarray):
+        # Count each undirected pair once (as lo-hi), then mirror it
+        lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+        pair_keys, counts = np.unique(lo * max(n, 1) + hi, return_counts=True)
+        lo, hi = pair_keys // max(n, 1), pair_keys % max(n, 1)
+        rows = np.concatenate([lo, hi])
+        cols = np.concatenate([hi, lo])
+        weights = np.concatenate([counts, counts]).astype(np.float32)
+
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order].astype(np.int32)
+        self.weights = weights[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def number_of_nodes(self):
+        return len(self._names)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def node_names(self):
+        return self._names
+
+    def node_id(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def node_type(self, name):
+        idx = self._ids.get(name)
+        return None if idx is None else self._type_names[self._types[idx]]
+
+    def neighbor_ids(self, idx: int) -> np.ndarray:
+        return self.indices[self.indptr[idx]:self.indptr[idx + 1]]
+
+    def neighbors(self, name, limit=None):
+        idx = self._ids.get(name)
+        if idx is None:
+            return []
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        order = np.argsort(-self.weights[start:end], kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return [self._names[j] for j in self.indices[start:end][order]]
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def weighted_degrees(self) -> np.ndarray:
+        """Sum of edge weights per node, aligned with node_names()"""
+        n = self.number_of_nodes()
+        rows = np.repeat(np.arange(n), self.degrees())
+        return np.bincount(rows, weights=self.weights, minlength=n)
+
+    def to_networkx(self, nodes=None):
+        graph = nx.Graph()
+        if nodes is None:
+            keep = np.ones(self.number_of_nodes(), dtype=bool)
+        else:
+            keep = np.zeros(self.number_of_nodes(), dtype=bool)
+            keep[[self._ids[name] for name in nodes if name in self._ids]] = True
+        for idx in np.flatnonzero(keep):
+            graph.add_node(self._names[idx], type=self._type_names[self._types[idx]])
+        rows = np.repeat(np.arange(self.number_of_nodes()), self.degrees())
+        mask = (rows < self.indices) & keep[rows] & keep[self.indices]
+        for i, j, w in zip(rows[mask], self.indices[mask], self.weights[mask]):
+            graph.add_edge(self._names[i], self._names[j], weight=float(w))
+        return graph
+
+
+class NetworkXGraphStore(GraphStore):
+    """GraphStore backed by a networkx Graph (kept for compatibility)"""
+
+    def __init__(self):
+        self.graph = nx.Graph()
+        self._names: Optional[List[str]] = None
+
+    def build(self, nodes, edges):
+        self.graph = nx.Graph()
+        self._names = None
+        for name, node_type in nodes:
+            if name not in self.graph:
+                self.graph.add_node(name, type=node_type)
+        for u, v in edges:
+            if u == v or u not in self.graph or v not in self.graph:
+                continue
+            if self.graph.has_edge(u, v):
+                self.graph[u][v]['weight'] += 1
+            else:
+                self.graph.add_edge(u, v, weight=1)
+
+    def __contains__(self, name):
+        return name in self.graph
+
+    def number_of_nodes(self):
+        return self.graph.number_of_nodes()
+
+    def number_of_edges(self):
+        return self.graph.number_of_edges()
+
+    def node_names(self):
+        if self._names is None:
+            self._names = list(self.graph.nodes)
+        return self._names
+
+    def node_type(self, name):
+        if name not in self.graph:
+            return None
+        return self.graph.nodes[name].get('type')
+
+    def neighbors(self, name, limit=None):
+        if name not in self.graph:
+            return []
+        edges = self.graph[name]
+        neighbors = sorted(edges, key=lambda other: -edges[other].get('weight', 1))
+        return neighbors if limit is None else neighbors[:limit]
+
+    def degrees(self):
+        return np.fromiter((d for _, d in self.graph.degree(self.node_names())), dtype=np.int64,
+                           count=self.number_of_nodes())
+
+    def to_networkx(self, nodes=None):
+        if nodes is None:
+            return self.graph.copy()
+        return self.graph.subgraph(nodes).copy()
+
+
+GRAPH_BACKENDS = {
+    'csr': CSRGraphStore,
+    'networkx': NetworkXGraphStore,
+}
+
+
+def create_graph_store(backend: str = 'csr') -> GraphStore:
+    """Create an empty graph store for the named backend"""
+    try:
+        return GRAPH_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown graph backend '{backend}'. Choose from: {', '.join(GRAPH_BACKENDS)}")
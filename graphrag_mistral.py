@@ -4,52 +4,201 @@ Handles text file upload, knowledge graph construction, and Q&A chatbot
 """
 
 import os
-import re
 import json
+import time
 from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
 import networkx as nx
-from mistralai import Mistral
+from mistral_pool import get_mistral_client
+from context_builder import ContextBuilder
+from answer_cache import SemanticAnswerCache, chunk_fingerprint
+from graph_store import GraphStore, create_graph_store
+from entity_resolution import EntityCanonicalizer
+from embedders import Embedder, create_embedder
+from vector_index import ExactSearchIndex
+from communities import CommunityIndex, answer_global_question, is_global_question
+from relation_store import RelationStore, extract_svo_triples
+from chunk_dedup import ChunkDeduplicator, dedup_stats
+from reranker import CrossEncoderReranker
+from extraction_batching import (ExtractionReplyError, build_extraction_prompt, input_token_budget,
+                                  is_batch_size_error, pack_batches, parse_extraction_response)
+from profiling import Profiler, memory_report, profiled
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import spacy
-from sentence_transformers import SentenceTransformer
+
+SPACY_MODEL = "en_core_web_sm"
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+# Files written by GraphRAGSystem.save_snapshot()
+SNAPSHOT_STATE = 'state.json'
+SNAPSHOT_EMBEDDINGS = 'embeddings.npy'
+SNAPSHOT_VERSION = 1
+
+# Setting this enables profiling of ingest and questions (see enable_profiling())
+PROFILE_DIR_ENV = 'GRAPHRAG_PROFILE_DIR'
+
+# Chunks per spaCy nlp.pipe() batch
+SPACY_BATCH_SIZE = 32
+
+
+def extract_spacy_entities(spacy_doc) -> Tuple[List[Tuple[str, str]], List[List[str]], List[Tuple[str, str, str]]]:
+    """
+    Pull entity mentions, per-sentence entity lists and SVO triples out of a parsed chunk
+    
+    Returns:
+        (mentions as (text, label) pairs, entity texts for each sentence,
+         (subject, predicate, object) triples)
+    """
+    mentions = [(ent.text.strip(), ent.label_) for ent in spacy_doc.ents if len(ent.text.strip()) > 1]
+    sentences = [[ent.text for ent in sent.ents if len(ent.text.strip()) > 1] for sent in spacy_doc.sents]
+    return mentions, sentences, extract_svo_triples(spacy_doc)
+
 
 class GraphRAGSystem:
-    def __init__(self, mistral_api_key: str, model: str = "mistral-large-latest"):
+    def __init__(self, mistral_api_key: str, model: str = "mistral-large-latest",
+                 context_token_budget: int = 1500, context_candidates: int = 10,
+                 answer_cache_threshold: Optional[float] = 0.92, graph_backend: str = "csr",
+                 entity_fuzzy_threshold: Optional[float] = None,
+                 embedder: Optional[Embedder] = None, nlp=None,
+                 embedding_backend: str = "sentence-transformers", embedding_batch_size: int = 32,
+                 embedding_threads: Optional[int] = None, search_block_size: Optional[int] = None,
+                 community_method: str = "louvain", near_duplicate_threshold: Optional[float] = 0.9,
+                 extraction_token_budget: Optional[int] = None, extraction_max_chunks: int = 32,
+                 reranker: Optional[CrossEncoderReranker] = None, rerank_candidates: int = 50):
         """
         Initialize the GraphRAG System
         
         Args:
             mistral_api_key: Your Mistral API key
             model: Mistral model to use (default: mistral-large-latest)
+            context_token_budget: Estimated token budget for prompt context (default: 1500)
+            context_candidates: Chunks retrieved as packing candidates per question (default: 10)
+            answer_cache_threshold: Question similarity for reusing a cached answer (None disables the cache)
+            graph_backend: Knowledge graph storage, "csr" (compact arrays) or "networkx"
+            entity_fuzzy_threshold: Character n-gram similarity for merging near-duplicate
+                entity names (None merges only names that normalize identically)
+            embedder: Already loaded embedder (or SentenceTransformer) to share
+                between systems (default: create one with embedding_backend)
+            nlp: Already loaded spaCy pipeline to share between systems
+                (default: load SPACY_MODEL; False runs without spaCy)
+            embedding_backend: "sentence-transformers", "onnx" or "onnx-int8" (see embedders.py)
+            embedding_batch_size: Texts per embedding forward pass
+            embedding_threads: CPU threads for embedding (default: the backend's default)
+            search_block_size: Chunks scored per step in retrieval, to bound temporary
+                memory on very large corpora (None scores all chunks at once)
+            community_method: Community detection for global questions, "louvain"
+                or "label_propagation"
+            near_duplicate_threshold: Word-shingle similarity above which a chunk is
+                treated as a copy of an earlier one and not extracted or embedded
+                again (None: only identical chunks are deduplicated)
+            extraction_token_budget: Chunk tokens per Mistral extraction request when
+                spaCy is unavailable (default: half the model's context window)
+            extraction_max_chunks: Most chunks per extraction request, bounding the reply size
+            reranker: Cross-encoder that rescores a wider candidate pool before
+                packing (see reranker.py; default: bi-encoder ranking only)
+            rerank_candidates: Chunks retrieved for the reranker, which keeps the
+                best context_candidates of them
         """
-        self.mistral_client = Mistral(api_key="wC6qujfIk7MlyJyagePGqu7YdNxmBFHr")
+        # Clients are shared per API key so instances reuse keep-alive connections
+        self.mistral_client = get_mistral_client(mistral_api_key)
         self.model = model
+        self.extraction_token_budget = extraction_token_budget
+        self.extraction_max_chunks = extraction_max_chunks
+        
+        # Initialize NLP models (names are kept so worker processes can load the same ones)
+        self.spacy_model = SPACY_MODEL
+        self.embedding_model = EMBEDDING_MODEL
+        self.embedding_backend = embedding_backend
+        self.embedding_batch_size = embedding_batch_size
+        if nlp is not None:
+            self.nlp = nlp or None
+        else:
+            try:
+                self.nlp = spacy.load(self.spacy_model)
+            except OSError:
+                print(f"Warning: spaCy model '{SPACY_MODEL}' not found. Install with: python -m spacy download {SPACY_MODEL}")
+                self.nlp = None
+        
+        # Initialize the sentence embedder
+        if embedder is not None:
+            self.embedder = embedder
+            self.embedding_backend = getattr(embedder, 'backend', 'sentence-transformers')
+        else:
+            print(f"Loading sentence embedding model ({embedding_backend})...")
+            self.embedder = create_embedder(embedding_backend, self.embedding_model,
+                                            batch_size=embedding_batch_size, num_threads=embedding_threads)
         
-        # Initialize NLP models
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Warning: spaCy model 'en_core_web_sm' not found. Install with: python -m spacy download en_core_web_sm")
-            self.nlp = None
-        
-        # Initialize sentence transformer for embeddings
-        print("Loading sentence transformer model...")
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Knowledge graph
-        self.graph = nx.Graph()
+        # Knowledge graph (use self.graph.to_networkx() for a networkx copy)
+        self.graph: GraphStore = create_graph_store(graph_backend)
         
         # Document storage
         self.documents = []  # List of text chunks
+        self.chunk_dedup = ChunkDeduplicator(near_threshold=near_duplicate_threshold)
+        self.chunk_canonical = []  # chunk_idx -> first chunk with the same (or nearly the same) text
+        self.search_index = ExactSearchIndex(block_size=search_block_size)  # follows document_embeddings
+        self._search_rows = None  # search index row -> chunk_idx, when duplicates are left out
         self.document_embeddings = None  # Embeddings for chunks
         self.entity_to_chunks = defaultdict(list)  # Map entities to document chunks
         
         # Entity information
         self.entities = {}  # entity_name -> entity_info
         self.relationships = []  # List of (entity1, relationship, entity2)
-        
+        self.relation_store = RelationStore()  # Typed (subject, predicate, object) facts
+        
+        # Per-chunk extraction results, kept so entity tables can be rebuilt
+        # without re-running NLP when chunks are added or removed
+        self.chunk_extractions = []  # chunk_idx -> (mentions, sentence entity lists, triples)
+        self.chunk_sources = []  # chunk_idx -> source file (None for load_text_file)
+        
+        # Alias table shared by extraction, graph building and query matching
+        self.entity_fuzzy_threshold = entity_fuzzy_threshold
+        self.canonicalizer = EntityCanonicalizer(fuzzy_threshold=entity_fuzzy_threshold)
+        
+        # Prompt context packing
+        self.chunk_overlap = 0
+        self.context_candidates = context_candidates
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.context_builder = ContextBuilder(token_budget=context_token_budget)
+        
+        # Answers to earlier (paraphrased) questions, invalidated when their chunks change
+        self.chunk_fingerprints = []  # chunk_idx -> content hash
+        self.answer_cache = None
+        if answer_cache_threshold is not None:
+            self.answer_cache = SemanticAnswerCache(threshold=answer_cache_threshold)
+        
+        # Entity communities with cached summaries, used for corpus-wide questions
+        self.community_index = CommunityIndex(method=community_method)
+        self.global_communities = 8  # summaries considered per global question
+        
+        # cProfile/tracemalloc capture around ingest and questions (off unless enabled)
+        self.profiler = None
+        if os.environ.get(PROFILE_DIR_ENV):
+            self.enable_profiling(os.environ[PROFILE_DIR_ENV])
+        
+    @property
+    def document_embeddings(self) -> Optional[np.ndarray]:
+        """Chunk embeddings, aligned with documents"""
+        return self._document_embeddings
+    
+    @document_embeddings.setter
+    def document_embeddings(self, embeddings: Optional[np.ndarray]):
+        # Every assignment re-indexes, so retrieval never sees stale vectors
+        self._document_embeddings = embeddings
+        self._index_embeddings()
+    
+    def _index_embeddings(self):
+        """Build the search index over canonical chunks only (duplicates would crowd the top-k)"""
+        embeddings = self._document_embeddings
+        self._search_rows = None
+        if embeddings is not None and len(embeddings) == len(self.chunk_canonical):
+            rows = np.flatnonzero(np.asarray(self.chunk_canonical) == np.arange(len(self.chunk_canonical)))
+            if len(rows) < len(embeddings):
+                self._search_rows = rows
+                embeddings = np.asarray(embeddings)[rows]
+        self.search_index.build(embeddings)
+    
+    @profiled
     def load_text_file(self, file_path: str, chunk_size: int = 500, chunk_overlap: int = 50):
         """
         Load and process a text file
@@ -65,19 +214,135 @@ class GraphRAGSystem:
             text = f.read()
         
         # Split into chunks
-        self.documents = self._chunk_text(text, chunk_size, chunk_overlap)
+        self._set_documents(self._chunk_text(text, chunk_size, chunk_overlap), chunk_overlap)
         print(f"Created {len(self.documents)} text chunks")
         
         # Process documents to extract entities and build graph
         self._process_documents()
         
-        # Generate embeddings for all chunks
+        # Generate embeddings for all chunks (duplicates share their canonical chunk's row)
         print("Generating embeddings for document chunks...")
-        self.document_embeddings = self.embedder.encode(self.documents, show_progress_bar=True)
+        self.document_embeddings = self._embed_chunks()
         
         print(f"GraphRAG system initialized with {len(self.documents)} chunks")
         print(f"Knowledge graph contains {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges")
     
+    @profiled
+    def load_sharded(self, path: str, num_workers: int = 4, chunk_size: int = 500,
+                     chunk_overlap: int = 50, shard_size: Optional[int] = None) -> Dict:
+        """
+        Load a text file or a directory of .txt files using parallel worker processes
+        
+        Produces the same entities, relationships and graph as processing the
+        chunks in a single process (see sharded_ingest.py).
+        
+        Args:
+            path: Text file or directory
+            num_workers: Worker processes (1 runs everything in this process)
+            chunk_size: Size of each text chunk
+            chunk_overlap: Overlap between chunks
+            shard_size: Chunks per shard (default: about 4 shards per worker)
+        
+        Returns:
+            Ingest statistics (files, chunks, shards, workers, timings)
+        """
+        from sharded_ingest import ingest_sharded
+        return ingest_sharded(self, path, num_workers=num_workers, chunk_size=chunk_size,
+                              chunk_overlap=chunk_overlap, shard_size=shard_size)
+    
+    @profiled
+    def sync_directory(self, directory: str, manifest_path: Optional[str] = None,
+                       chunk_size: int = 500, chunk_overlap: int = 50) -> Dict:
+        """
+        Load a directory of documents incrementally (see corpus_loader.py)
+        
+        Only files added, changed or deleted since the last sync are processed;
+        a manifest of file sizes, mtimes and hashes is kept in the directory.
+        
+        Args:
+            directory: Corpus directory (.txt, .md, .html, .json, .csv, .pdf, .docx)
+            manifest_path: Manifest location (default: <directory>/.graphrag_manifest.json)
+            chunk_size: Size of each text chunk
+            chunk_overlap: Overlap between chunks
+        
+        Returns:
+            Sync statistics
+        """
+        from corpus_loader import CorpusLoader
+        loader = CorpusLoader(self, directory, manifest_path=manifest_path,
+                              chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        return loader.sync()
+    
+    def save_snapshot(self, directory: str):
+        """
+        Persist the loaded corpus so it can be restored without re-running NLP or embeddings
+        
+        Writes chunks, per-chunk extractions and embeddings; entities and the
+        graph are rebuilt from the extractions by load_snapshot().
+        
+        Args:
+            directory: Snapshot directory (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        embeddings = self.document_embeddings
+        if embeddings is None:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+        tmp_path = os.path.join(directory, SNAPSHOT_EMBEDDINGS + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(embeddings, dtype=np.float32))
+        os.replace(tmp_path, os.path.join(directory, SNAPSHOT_EMBEDDINGS))
+        
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'embedding_model': self.embedding_model,
+            'embedding_backend': self.embedding_backend,
+            'chunk_overlap': self.chunk_overlap,
+            'documents': self.documents,
+            'chunk_fingerprints': self.chunk_fingerprints,
+            'chunk_sources': self.chunk_sources,
+            'chunk_extractions': self.chunk_extractions,
+            'embedding_rows': len(embeddings),
+            'community_summaries': self.community_index.summaries,
+        }
+        tmp_path = os.path.join(directory, SNAPSHOT_STATE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, os.path.join(directory, SNAPSHOT_STATE))
+    
+    def load_snapshot(self, directory: str):
+        """
+        Replace the loaded corpus with one written by save_snapshot()
+        
+        Args:
+            directory: Snapshot directory
+        """
+        with open(os.path.join(directory, SNAPSHOT_STATE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {directory}: {state.get('version')}")
+        if state['embedding_model'] != self.embedding_model:
+            raise ValueError(f"Snapshot in {directory} was embedded with {state['embedding_model']}, "
+                             f"not {self.embedding_model}")
+        if state.get('embedding_backend', self.embedding_backend) != self.embedding_backend:
+            print(f"Warning: snapshot in {directory} was embedded with the {state['embedding_backend']} "
+                  f"backend; queries use {self.embedding_backend}")
+        embeddings = np.load(os.path.join(directory, SNAPSHOT_EMBEDDINGS))
+        if len(embeddings) != state['embedding_rows']:
+            raise ValueError(f"Snapshot in {directory} is incomplete (embeddings do not match chunks)")
+        
+        self._set_documents(state['documents'], state['chunk_overlap'], state['chunk_sources'])
+        self.chunk_fingerprints = state['chunk_fingerprints']
+        self.chunk_extractions = [
+            None if extraction is None else (
+                [tuple(m) for m in extraction[0]], extraction[1],
+                [tuple(t) for t in extraction[2]] if len(extraction) > 2 else []
+            )
+            for extraction in state['chunk_extractions']
+        ]
+        self.document_embeddings = embeddings if len(embeddings) else None
+        self.community_index.summaries = state.get('community_summaries', {})
+        self._rebuild_entity_tables()
+    
     def _chunk_text(self, text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
         """Split text into overlapping chunks"""
         chunks = []
@@ -90,182 +355,398 @@ class GraphRAGSystem:
         
         return chunks
     
-    def _process_documents(self):
-        """Process documents to extract entities and relationships"""
+    def _set_documents(self, documents: List[str], chunk_overlap: int, sources: Optional[List[str]] = None):
+        """Replace the chunk store and clear everything derived from it"""
+        self.documents = documents
+        self.chunk_overlap = chunk_overlap
+        self.chunk_fingerprints = [chunk_fingerprint(chunk) for chunk in documents]
+        self.chunk_extractions = [None] * len(documents)
+        self.chunk_sources = list(sources) if sources is not None else [None] * len(documents)
+        self.document_embeddings = None
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        self._reset_entity_tables()
+        self._dedup_chunks()
+    
+    def _dedup_chunks(self) -> Dict:
+        """
+        Map every chunk to its canonical copy (see chunk_dedup.py)
+        
+        Duplicates drop their extractions, so entities, relationships and
+        entity_to_chunks only ever refer to canonical chunks.
+        
+        Returns:
+            Deduplication statistics
+        """
+        self.chunk_canonical = self.chunk_dedup.canonical_ids(self.documents, self.chunk_fingerprints)
+        for idx, target in enumerate(self.chunk_canonical):
+            if target != idx:
+                self.chunk_extractions[idx] = None
+        self._index_embeddings()
+        
+        stats = dedup_stats(self.chunk_canonical, self.chunk_fingerprints)
+        if stats['unique'] < stats['chunks']:
+            print(f"Deduplicated chunks: {stats['unique']} unique of {stats['chunks']} "
+                  f"({stats['exact_duplicates']} exact, {stats['near_duplicates']} near duplicates; "
+                  f"{stats['dedup_ratio']:.1%} of extraction and embedding skipped)")
+        return stats
+    
+    def _unique_chunks(self, indices: Optional[List[int]] = None) -> List[int]:
+        """The canonical chunks among indices (default: all chunks)"""
+        if indices is None:
+            indices = range(len(self.documents))
+        return [idx for idx in indices if self.chunk_canonical[idx] == idx]
+    
+    def chunk_aliases(self, chunk_idx: int) -> List[int]:
+        """All chunks sharing a chunk's canonical copy, the canonical chunk first"""
+        target = self.chunk_canonical[chunk_idx]
+        return [idx for idx in range(target, len(self.documents)) if self.chunk_canonical[idx] == target]
+    
+    def _embed_chunks(self, start: int = 0) -> Optional[np.ndarray]:
+        """Embeddings for chunks start onwards; only canonical chunks are encoded"""
+        if len(self.documents) <= start:
+            return None
+        unique = self._unique_chunks(range(start, len(self.documents)))
+        if not unique:
+            # Every new chunk repeats one already embedded
+            return self._alias_rows(np.zeros((0, 0), dtype=np.float32), start)
+        encoded = self.embedder.encode([self.documents[idx] for idx in unique],
+                                       show_progress_bar=len(unique) > 100)
+        return self._alias_rows(np.asarray(encoded), start)
+    
+    def _alias_rows(self, unique_embeddings: np.ndarray, start: int = 0) -> np.ndarray:
+        """
+        Expand embeddings of the canonical chunks from start onwards to one row per chunk
+        
+        Duplicates of chunks before start copy the row already in document_embeddings.
+        """
+        unique = self._unique_chunks(range(start, len(self.documents)))
+        if len(unique) == len(self.documents) - start:
+            return unique_embeddings
+        row_of = {idx: row for row, idx in enumerate(unique)}
+        rows = []
+        for idx in range(start, len(self.documents)):
+            target = self.chunk_canonical[idx]
+            rows.append(unique_embeddings[row_of[target]] if target >= start else self.document_embeddings[target])
+        return np.vstack(rows)
+    
+    def _reset_entity_tables(self):
+        """Clear entities, relationships and the alias table"""
+        self.entities = {}
+        self.entity_to_chunks = defaultdict(list)
+        self.relationships = []
+        self.canonicalizer = EntityCanonicalizer(fuzzy_threshold=self.entity_fuzzy_threshold)
+    
+    def _rebuild_entity_tables(self):
+        """Rebuild entities, relationships and the graph from stored per-chunk extractions"""
+        self._reset_entity_tables()
+        for idx, extraction in enumerate(self.chunk_extractions):
+            if extraction is not None:
+                self._record_chunk_entities(idx, *extraction[:2])
+        self._finalize_knowledge_graph()
+    
+    def _process_documents(self, indices: Optional[List[int]] = None):
+        """
+        Process documents to extract entities and relationships
+        
+        Args:
+            indices: Chunks to extract (default: all). Other chunks keep their
+                stored extractions; the graph is rebuilt over all of them.
+        """
         print("Extracting entities and relationships...")
+        full = indices is None or len(indices) == len(self.documents)
+        # Duplicate chunks alias their canonical chunk and are not extracted again
+        indices = self._unique_chunks(indices)
+        if full:
+            self._reset_entity_tables()
         
         if self.nlp is None:
             # Fallback: simple entity extraction using Mistral
-            self._extract_entities_with_mistral()
+            self._extract_entities_with_mistral(indices)
         else:
             # Use spaCy for entity extraction
-            self._extract_entities_with_spacy()
+            self._extract_entities_with_spacy(indices)
+        
+        if full:
+            self._finalize_knowledge_graph()
+        else:
+            self._rebuild_entity_tables()
+    
+    def _finalize_knowledge_graph(self):
+        """Settle canonical entity names, then build the knowledge graph"""
+        # Merge near-duplicate entities and settle their canonical names
+        self._apply_entity_renames(self.canonicalizer.resolve())
         
         # Build knowledge graph
         self._build_knowledge_graph()
+        self._build_relation_store()
     
-    def _extract_entities_with_spacy(self):
-        """Extract entities using spaCy"""
-        for idx, doc_text in enumerate(self.documents):
-            spacy_doc = self.nlp(doc_text)
+    def _build_relation_store(self):
+        """Index extracted triples under canonical entity names"""
+        self.relation_store.clear()
+        for idx, extraction in enumerate(self.chunk_extractions):
+            if extraction is None or len(extraction) < 3:
+                continue
+            for subj, pred, obj in extraction[2]:
+                subj_name = self.canonicalizer.lookup(subj)
+                obj_name = self.canonicalizer.lookup(obj)
+                # Keep facts about at least one known entity ("Alice founded the company")
+                if subj_name is None and obj_name is None:
+                    continue
+                self.relation_store.add(subj_name or subj, pred, obj_name or obj, idx)
+    
+    def _extract_entities_with_spacy(self, indices: List[int]):
+        """Extract entities and SVO triples using spaCy (batched through nlp.pipe)"""
+        texts = (self.documents[idx] for idx in indices)
+        for idx, spacy_doc in zip(indices, self.nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE)):
+            extraction = extract_spacy_entities(spacy_doc)
+            self.chunk_extractions[idx] = extraction
+            self._record_chunk_entities(idx, *extraction[:2])
+    
+    def _record_chunk_entities(self, idx: int, mentions: List[Tuple[str, str]], sentences: List[List[str]]):
+        """Add one chunk's extracted entities and co-occurrences to the entity tables"""
+        doc_text = self.documents[idx]
+        
+        # Record named entities
+        for entity_name, entity_type in mentions:
+            entity_name = self.canonicalizer.canonical(entity_name)
+            if entity_name not in self.entities:
+                self.entities[entity_name] = {
+                    'type': entity_type,
+                    'mentions': []
+                }
             
-            # Extract named entities
-            for ent in spacy_doc.ents:
-                entity_name = ent.text.strip()
-                entity_type = ent.label_
-                
-                if len(entity_name) > 1:  # Filter out single characters
-                    if entity_name not in self.entities:
-                        self.entities[entity_name] = {
-                            'type': entity_type,
-                            'mentions': []
-                        }
-                    
-                    self.entities[entity_name]['mentions'].append({
-                        'chunk_idx': idx,
-                        'text': doc_text[:200]  # Store snippet
-                    })
-                    
-                    self.entity_to_chunks[entity_name].append(idx)
+            self.entities[entity_name]['mentions'].append({
+                'chunk_idx': idx,
+                'text': doc_text[:200]  # Store snippet
+            })
             
-            # Extract relationships (simplified: co-occurrence in same sentence)
-            for sent in spacy_doc.sents:
-                sent_entities = [ent.text for ent in sent.ents if len(ent.text) > 1]
-                for i, ent1 in enumerate(sent_entities):
-                    for ent2 in sent_entities[i+1:]:
-                        if ent1 != ent2:
-                            self.relationships.append((ent1, 'related_to', ent2))
-    
-    def _extract_entities_with_mistral(self):
+            self.entity_to_chunks[entity_name].append(idx)
+        
+        # Extract relationships (simplified: co-occurrence in same sentence)
+        for sent_texts in sentences:
+            sent_entities = [self.canonicalizer.lookup(text) for text in sent_texts]
+            sent_entities = [name for name in sent_entities if name]
+            for i, ent1 in enumerate(sent_entities):
+                for ent2 in sent_entities[i+1:]:
+                    if ent1 != ent2:
+                        self.relationships.append((ent1, 'related_to', ent2))
+    
+    def _extract_entities_with_mistral(self, indices: List[int]):
         """Extract entities using Mistral API (fallback when spaCy not available)"""
-        print("Using Mistral API for entity extraction...")
-        
-        # Process in batches to avoid too many API calls
-        batch_size = 5
-        for i in range(0, len(self.documents), batch_size):
-            batch = self.documents[i:i+batch_size]
-            batch_text = "\n\n".join([f"Chunk {j}: {chunk}" for j, chunk in enumerate(batch)])
-            
-            prompt = f"""Extract all important entities (people, places, organizations, concepts) from the following text chunks.
-Return a JSON list of entities with their types. Format:
-[{{"entity": "EntityName", "type": "PERSON|ORG|LOC|CONCEPT"}}]
-
-Text:
-{batch_text[:2000]}
-
-JSON:"""
-            
+        # Whole chunks packed into as few requests as the token budget allows
+        token_budget = input_token_budget(self.model, self.extraction_token_budget)
+        texts = [self.documents[idx] for idx in indices]
+        pending = [[indices[pos] for pos in batch]
+                   for batch in pack_batches(texts, token_budget, self.extraction_max_chunks)]
+        print(f"Using Mistral API for entity extraction: {len(indices)} chunks in {len(pending)} request(s)...")
+        
+        while pending:
+            batch_indices = pending.pop(0)
+            batch = [self.documents[idx] for idx in batch_indices]
             try:
                 response = self.mistral_client.chat.complete(
                     model=self.model,
-                    messages=[{"role": "user", "content": prompt}]
+                    messages=[{"role": "user", "content": build_extraction_prompt(batch)}]
                 )
-                
                 result = response.choices[0].message.content.strip()
-                # Try to extract JSON from response
-                json_match = re.search(r'\[.*\]', result, re.DOTALL)
-                if json_match:
-                    entities_data = json.loads(json_match.group())
-                    for entity_data in entities_data:
-                        entity_name = entity_data.get('entity', '').strip()
-                        entity_type = entity_data.get('type', 'CONCEPT')
-                        if entity_name:
-                            if entity_name not in self.entities:
-                                self.entities[entity_name] = {
-                                    'type': entity_type,
-                                    'mentions': []
-                                }
-                            # Track the batch range for this entity (entity found in chunks i to i+len(batch))
-                            for chunk_idx in range(i, min(i + len(batch), len(self.documents))):
-                                if chunk_idx not in self.entity_to_chunks[entity_name]:
-                                    self.entity_to_chunks[entity_name].append(chunk_idx)
-                                    self.entities[entity_name]['mentions'].append({
-                                        'chunk_idx': chunk_idx,
-                                        'text': self.documents[chunk_idx][:200]
-                                    })
+                per_chunk = parse_extraction_response(result, batch)
+                if per_chunk is None:
+                    raise ExtractionReplyError("no JSON in the reply")
             except Exception as e:
-                print(f"Error extracting entities from batch {i}: {e}")
+                # Too long a request or a garbled reply: retry the batch in halves.
+                # Other failures (auth, rate limits) would only repeat, so give up on the batch.
+                if len(batch_indices) > 1 and is_batch_size_error(e):
+                    half = len(batch_indices) // 2
+                    pending[:0] = [batch_indices[:half], batch_indices[half:]]
+                    print(f"Error extracting entities from {len(batch_indices)} chunks ({e}); retrying in halves")
+                else:
+                    print(f"Error extracting entities from {len(batch_indices)} chunk(s) "
+                          f"starting at chunk {batch_indices[0]}: {e}")
                 continue
+            
+            for chunk_idx, (entities_data, relations_data) in zip(batch_indices, per_chunk):
+                mentions, seen = [], set()
+                for entity_data in entities_data:
+                    if not isinstance(entity_data, dict):
+                        continue
+                    entity_name = str(entity_data.get('entity', '')).strip()
+                    entity_type = entity_data.get('type', 'CONCEPT')
+                    key = self.canonicalizer.normalize(entity_name)
+                    if entity_name and key not in seen:
+                        seen.add(key)
+                        mentions.append((entity_name, entity_type))
+                triples = []
+                for relation in relations_data:
+                    if not isinstance(relation, dict):
+                        continue
+                    triple = tuple(str(relation.get(k, '')).strip() for k in ('subject', 'predicate', 'object'))
+                    if all(triple):
+                        triples.append(triple)
+                # No sentence lists, so no co-occurrence edges from LLM extraction
+                self.chunk_extractions[chunk_idx] = (mentions, [], triples)
+                self._record_chunk_entities(chunk_idx, mentions, [])
+    
+    def _apply_entity_renames(self, renames: Dict[str, str]):
+        """Rename (and merge) entities after canonical names change"""
+        if not renames:
+            return
+        
+        merged = {}
+        for entity_name, entity_info in self.entities.items():
+            target = renames.get(entity_name, entity_name)
+            if target in merged:
+                merged[target]['mentions'].extend(entity_info['mentions'])
+            else:
+                merged[target] = {**entity_info, 'mentions': list(entity_info['mentions'])}
+        self.entities = merged
+        
+        entity_to_chunks = defaultdict(list)
+        for entity_name, chunk_ids in self.entity_to_chunks.items():
+            entity_to_chunks[renames.get(entity_name, entity_name)].extend(chunk_ids)
+        self.entity_to_chunks = entity_to_chunks
+        
+        self.relationships = [
+            (renames.get(ent1, ent1), rel, renames.get(ent2, ent2))
+            for ent1, rel, ent2 in self.relationships
+            if renames.get(ent1, ent1) != renames.get(ent2, ent2)
+        ]
     
     def _build_knowledge_graph(self):
         """Build knowledge graph from entities and relationships"""
-        # Add entities as nodes
-        for entity_name, entity_info in self.entities.items():
-            self.graph.add_node(entity_name, **entity_info)
-        
-        # Add relationships as edges
-        relationship_counts = defaultdict(int)
-        for ent1, rel, ent2 in self.relationships:
-            if ent1 in self.entities and ent2 in self.entities:
-                key = tuple(sorted([ent1, ent2]))
-                relationship_counts[key] += 1
-                self.graph.add_edge(ent1, ent2, weight=relationship_counts[key])
-        
+        # Entities become nodes; mentions stay in self.entities to keep the graph compact.
+        # Repeated relationships between the same pair add to the edge weight.
+        self.graph.build(
+            ((entity_name, entity_info['type']) for entity_name, entity_info in self.entities.items()),
+            ((ent1, ent2) for ent1, rel, ent2 in self.relationships)
+        )
+        
+        self.community_index.stale = True
         print(f"Built knowledge graph with {self.graph.number_of_nodes()} entities")
     
-    def _retrieve_relevant_chunks(self, query: str, top_k: int = 5) -> List[Tuple[int, float, str]]:
+    def _retrieve_relevant_chunks(self, query: str, top_k: int = 5,
+                                  query_embedding: Optional[np.ndarray] = None) -> List[Tuple[int, float, str]]:
         """Retrieve most relevant document chunks using semantic similarity"""
-        query_embedding = self.embedder.encode([query])
+        if query_embedding is None:
+            query_embedding = self.embedder.encode([query])
         
-        # Calculate cosine similarity
-        similarities = cosine_similarity(query_embedding, self.document_embeddings)[0]
-        
-        # Get top-k chunks
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        # Cosine similarity against the pre-normalized index, partial top-k selection
+        top_indices, scores = self.search_index.search(query_embedding, top_k)
+        if self._search_rows is not None:
+            top_indices = self._search_rows[top_indices]
         
         results = []
-        for idx in top_indices:
-            results.append((idx, float(similarities[idx]), self.documents[idx]))
+        for idx, score in zip(top_indices, scores):
+            results.append((int(idx), float(score), self.documents[idx]))
         
         return results
     
-    def _get_graph_context(self, query: str) -> str:
-        """Get relevant context from knowledge graph"""
-        # Find entities in query
-        query_lower = query.lower()
-        relevant_entities = []
+    def _query_entities(self, query: str) -> List[str]:
+        """Known entities mentioned in a query (any surface form in the alias table matches)"""
+        return [
+            entity_name for entity_name in self.canonicalizer.find_in_text(query)
+            if entity_name in self.entities
+        ]
+    
+    def build_communities(self) -> Dict:
+        """
+        Detect graph communities and summarize them with Mistral (offline stage)
         
-        for entity_name in self.entities.keys():
-            if entity_name.lower() in query_lower:
-                relevant_entities.append(entity_name)
+        Summaries are cached per community content, so a rebuild after the
+        corpus changes only summarizes communities that changed. Until this
+        is called (again after the corpus changes or a snapshot is loaded),
+        global questions are answered from retrieved chunks.
         
-        # Get neighbors of relevant entities
+        Returns:
+            Build statistics
+        """
+        return self.community_index.build(self)
+    
+    def _get_graph_context(self, query: str) -> str:
+        """Get relevant context from knowledge graph"""
+        relevant_entities = self._query_entities(query)[:5]  # Limit to top 5 entities
+        query_predicates = set(self.relation_store.match_predicates(query))
+        
+        # Typed facts first: facts linking two query entities, then facts whose
+        # predicate the query uses, then the best supported ones
+        named = set(relevant_entities)
+        fact_lines, seen = [], set()
+        for entity in relevant_entities:
+            facts = self.relation_store.facts_for_entity(entity)
+            facts.sort(key=lambda f: (-((f.subject in named) and (f.object in named)),
+                                      -(f.predicate in query_predicates)))
+            for fact in facts[:5]:
+                if fact not in seen:
+                    seen.add(fact)
+                    fact_lines.append(f"{fact} (stated in {fact.support} chunk{'s' if fact.support > 1 else ''})")
+        if not relevant_entities:
+            for predicate in sorted(query_predicates)[:3]:
+                fact_lines.extend(str(fact) for fact in self.relation_store.facts_for_predicate(predicate, limit=5))
+        
+        # Then co-occurrence neighbours of relevant entities
         context_parts = []
-        for entity in relevant_entities[:5]:  # Limit to top 5 entities
+        for entity in relevant_entities:
             if entity in self.graph:
-                neighbors = list(self.graph.neighbors(entity))[:5]
+                neighbors = self.graph.neighbors(entity, limit=5)
                 context_parts.append(f"Entity '{entity}' is connected to: {', '.join(neighbors)}")
         
-        return "\n".join(context_parts)
+        return "\n".join(fact_lines + context_parts)
     
-    def ask_question(self, question: str, use_graph: bool = True) -> str:
+    @profiled
+    def ask_question(self, question: str, use_graph: bool = True, global_search: Optional[bool] = None) -> str:
         """
         Ask a question and get an answer using GraphRAG
         
         Args:
             question: The question to ask
             use_graph: Whether to use graph context (default: True)
+            global_search: Answer from community summaries instead of chunks
+                (default: only for corpus-wide questions such as "main themes")
         
         Returns:
             Answer string
         """
         print(f"\nProcessing question: {question}")
         
-        # Retrieve relevant document chunks
-        relevant_chunks = self._retrieve_relevant_chunks(question, top_k=5)
-        
-        # Build context from retrieved chunks
-        context = "\n\n".join([
-            f"[Document Chunk {idx+1} (relevance: {score:.2f})]:\n{chunk[:500]}"
-            for idx, score, chunk in relevant_chunks
-        ])
+        # Embed once; used for both the answer cache and retrieval
+        query_embedding = self.embedder.encode([question])
+        
+        if global_search is None:
+            global_search = use_graph and is_global_question(question, self._query_entities(question))
+        if global_search:
+            answer = answer_global_question(self, question, query_embedding[0], self.global_communities)
+            if answer is not None:
+                return answer
+        
+        if self.answer_cache is not None:
+            hit = self.answer_cache.lookup(query_embedding[0], use_graph, self._chunk_fingerprint)
+            if hit is not None:
+                print(f"Answer cache hit (similarity {hit.similarity:.2f}, source chunks: {hit.chunk_ids})")
+                return hit.answer
+        
+        # Retrieve candidate document chunks; with a reranker, a wider pool cut down by the cross-encoder
+        pool_size = self.context_candidates if self.reranker is None else max(self.rerank_candidates,
+                                                                               self.context_candidates)
+        relevant_chunks = self._retrieve_relevant_chunks(
+            question, top_k=pool_size, query_embedding=query_embedding
+        )
+        if self.reranker is not None and relevant_chunks:
+            started = time.perf_counter()
+            pool = len(relevant_chunks)
+            relevant_chunks = self.reranker.rerank(question, relevant_chunks, self.context_candidates)
+            print(f"Reranked {pool} candidates in {(time.perf_counter() - started) * 1e3:.0f} ms")
         
         # Get graph context if enabled
-        graph_context = ""
+        graph_lines = []
         if use_graph:
-            graph_context = self._get_graph_context(question)
-            if graph_context:
-                graph_context = f"\n\n[Knowledge Graph Context]:\n{graph_context}"
+            graph_lines = self._get_graph_context(question).splitlines()
+        
+        # Pack the best chunks and graph facts into the token budget
+        context, graph_context, packing = self.context_builder.build(
+            relevant_chunks, self.documents, self.chunk_overlap, graph_lines
+        )
+        if graph_context:
+            graph_context = f"\n\n[Knowledge Graph Context]:\n{graph_context}"
         
         # Build prompt for Mistral
         system_prompt = """You are a helpful assistant that answers questions based on the provided context from documents and knowledge graph.
@@ -290,19 +771,60 @@ Answer:"""
             )
             
             answer = response.choices[0].message.content.strip()
+            if self.answer_cache is not None:
+                self.answer_cache.store(
+                    question, query_embedding[0], answer,
+                    {idx: self.chunk_fingerprints[idx] for idx in packing['chunk_ids']},
+                    use_graph=use_graph
+                )
             return answer
         
         except Exception as e:
             return f"Error generating answer: {str(e)}"
     
+    def enable_profiling(self, output_dir: str, cpu: bool = True, memory: bool = False, top: int = 30):
+        """
+        Profile every following ingest and question, writing one report per call
+        
+        Args:
+            output_dir: Directory for the reports
+            cpu: Write cProfile statistics (<call>.prof for pstats or snakeviz, <call>.txt summary)
+            memory: Write tracemalloc allocation sites (<call>-memory.txt); slows calls down
+            top: Functions / allocation sites listed in the summaries
+        """
+        self.profiler = Profiler(output_dir, cpu=cpu, memory=memory, top=top)
+    
+    def disable_profiling(self):
+        self.profiler = None
+    
+    def get_memory_usage(self, include_models: bool = True) -> Dict:
+        """
+        Approximate resident memory by component (see profiling.py)
+        
+        Args:
+            include_models: Also measure the embedder, spaCy pipeline and reranker
+        
+        Returns:
+            {'components': {name: bytes}, 'corpus_bytes', 'model_bytes', 'process_rss_bytes'}
+        """
+        return memory_report(self, include_models=include_models)
+    
+    def _chunk_fingerprint(self, chunk_idx: int) -> Optional[str]:
+        """Current content hash of a chunk, or None if it no longer exists"""
+        if 0 <= chunk_idx < len(self.chunk_fingerprints):
+            return self.chunk_fingerprints[chunk_idx]
+        return None
+    
     def get_graph_stats(self) -> Dict:
         """Get statistics about the knowledge graph"""
         return {
             'nodes': self.graph.number_of_nodes(),
             'edges': self.graph.number_of_edges(),
             'documents': len(self.documents),
+            'unique_chunks': len(self._unique_chunks()),
             'entities': len(self.entities),
-            'relationships': len(self.relationships)
+            'relationships': len(self.relationships),
+            'typed_relations': len(self.relation_store)
         }
     
     def visualize_graph(self, top_n: int = 20):
@@ -311,12 +833,10 @@ Answer:"""
             import matplotlib.pyplot as plt
             
             # Get top N most connected nodes
-            degree_centrality = nx.degree_centrality(self.graph)
-            top_nodes = sorted(degree_centrality.items(), key=lambda x: x[1], reverse=True)[:top_n]
-            top_node_names = [node for node, _ in top_nodes]
+            top_node_names = self.graph.top_nodes(top_n)
             
-            # Create subgraph
-            subgraph = self.graph.subgraph(top_node_names)
+            # Export just that subgraph to networkx for drawing
+            subgraph = self.graph.to_networkx(top_node_names)
             
             # Draw graph
             plt.figure(figsize=(12, 8))
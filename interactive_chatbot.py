@@ -50,7 +50,8 @@ def main():
     print("-" * 60)
     
     # Chat loop
-    print("\n🤖 Chatbot ready! Type your questions (or 'quit' to exit)")
+    print("\n🤖 Chatbot ready! Type your questions ('communities' to summarize themes for global questions, "
+          "'memory' for memory usage, 'quit' to exit)")
     print("=" * 60)
     
     while True:
@@ -63,6 +64,21 @@ def main():
         if not question:
             continue
         
+        if question.lower() == 'communities':
+            try:
+                rag_system.build_communities()
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
+            continue
+        
+        if question.lower() == 'memory':
+            usage = rag_system.get_memory_usage()
+            for name, size in sorted(usage['components'].items(), key=lambda item: -item[1]):
+                print(f"  • {name}: {size / 2**20:.1f} MiB")
+            if usage['process_rss_bytes'] is not None:
+                print(f"  • process RSS: {usage['process_rss_bytes'] / 2**20:.1f} MiB")
+            continue
+        
         print("\n🤔 Thinking...")
         try:
             answer = rag_system.ask_question(question, use_graph=True)
@@ -0,0 +1,142 @@
+"""
+Shared Mistral client pool
+Reuses one client (and its keep-alive HTTP connection pool) per API key
+"""
+
+import gc
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+from mistralai import Mistral
+
+
+class MistralClientPool:
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 60.0, timeout: float = 60.0,
+                 connect_timeout: float = 10.0, max_clients: int = 16):
+        """
+        Pool of Mistral clients keyed by API key
+
+        Args:
+            max_connections: Maximum open HTTP connections per client
+            max_keepalive_connections: Idle connections kept open for reuse per client
+            keepalive_expiry: Seconds an idle connection is kept alive
+            timeout: Read/write timeout for API calls in seconds
+            connect_timeout: TCP/TLS connect timeout in seconds
+            max_clients: Maximum number of API keys held; least recently used are dropped
+                from the pool (clients already handed out keep working, and their
+                connections are closed once the last holder lets go)
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_clients = max_clients
+
+        self._clients = OrderedDict()  # api_key -> (Mistral, httpx.Client)
+        self._lock = threading.Lock()
+        self._stats = {
+            'clients_created': 0,
+            'client_reuses': 0,
+            'clients_evicted': 0,
+            'requests': 0,
+            'connections_opened': 0,
+        }
+
+    def get(self, api_key: str) -> Mistral:
+        """Return the shared client for an API key, creating it on first use"""
+        with self._lock:
+            entry = self._clients.get(api_key)
+            if entry is not None:
+                self._clients.move_to_end(api_key)
+                self._stats['client_reuses'] += 1
+                return entry[0]
+
+            http_client = httpx.Client(
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+                event_hooks={'request': [self._on_request]},
+            )
+            client = Mistral(
+                api_key=api_key,
+                client=http_client,
+                timeout_ms=int(self.timeout.read * 1000),
+            )
+            # Evicted clients may still be held by systems, so they are closed
+            # (keep-alive sockets included) only when nothing references them
+            weakref.finalize(client, http_client.close)
+            self._clients[api_key] = (client, http_client)
+            self._stats['clients_created'] += 1
+
+            evicted = False
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self._stats['clients_evicted'] += 1
+                evicted = True
+
+        if evicted:
+            # Mistral clients reference themselves, so an evicted client nobody
+            # holds is only freed (and finalized) by the cycle collector
+            gc.collect()
+        return client
+
+    def _on_request(self, request: httpx.Request):
+        # httpcore reports connection setup through the "trace" extension;
+        # a request that never connects went over a kept-alive connection.
+        with self._lock:
+            self._stats['requests'] += 1
+        request.extensions['trace'] = self._trace
+
+    def _trace(self, event_name: str, info: Dict):
+        if event_name == 'connection.connect_tcp.complete':
+            with self._lock:
+                self._stats['connections_opened'] += 1
+
+    def stats(self) -> Dict:
+        """Client and connection reuse counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['active_clients'] = len(self._clients)
+        reused = max(stats['requests'] - stats['connections_opened'], 0)
+        stats['connections_reused'] = reused
+        stats['connection_reuse_ratio'] = reused / stats['requests'] if stats['requests'] else 0.0
+        return stats
+
+    def close(self):
+        """Close all pooled HTTP connections"""
+        with self._lock:
+            for _, http_client in self._clients.values():
+                http_client.close()
+            self._clients.clear()
+
+
+_default_pool: Optional[MistralClientPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> MistralClientPool:
+    """Process-wide pool, configured from MISTRAL_POOL_* / MISTRAL_TIMEOUT env vars"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = MistralClientPool(
+                max_connections=int(os.getenv("MISTRAL_POOL_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("MISTRAL_POOL_MAX_KEEPALIVE", "10")),
+                keepalive_expiry=float(os.getenv("MISTRAL_POOL_KEEPALIVE_EXPIRY", "60")),
+                timeout=float(os.getenv("MISTRAL_TIMEOUT", "60")),
+                connect_timeout=float(os.getenv("MISTRAL_CONNECT_TIMEOUT", "10")),
+                max_clients=int(os.getenv("MISTRAL_POOL_MAX_CLIENTS", "16")),
+            )
+        return _default_pool
+
+
+def get_mistral_client(api_key: str) -> Mistral:
+    """Shared Mistral client for an API key from the process-wide pool"""
+    return get_client_pool().get(api_key)
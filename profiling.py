@@ -0,0 +1,254 @@
+"""
+Memory accounting and profiling hooks
+Approximates resident memory per GraphRAGSystem component and captures
+cProfile / tracemalloc reports around ingest and question answering
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+# Component -> GraphRAGSystem attributes; an object shared by two components
+# is counted in the first one
+MEMORY_COMPONENTS = {
+    'documents': ('documents', 'chunk_sources', 'chunk_fingerprints', 'chunk_canonical'),
+    'embeddings': ('_document_embeddings', 'search_index', '_search_rows'),
+    'extractions': ('chunk_extractions',),
+    'entities': ('entities', 'entity_to_chunks', 'canonicalizer'),
+    'relationships': ('relationships', 'relation_store'),
+    'graph': ('graph',),
+    'caches': ('answer_cache', 'community_index', 'chunk_dedup'),
+}
+MODEL_ATTRIBUTES = ('embedder', 'nlp', 'reranker')
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """
+    Approximate resident bytes of an object graph
+
+    Follows containers, instance __dict__s and __slots__, counts NumPy arrays
+    by their buffer size and counts every object once (also across calls
+    sharing the same seen set). Views count their header; the buffer is
+    counted once, with the array (or other object) that owns it.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or callable(item):
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += sys.getsizeof(item)  # includes the buffer only if the array owns it
+            owner = item.base
+            while isinstance(owner, np.ndarray) and owner.base is not None:
+                owner = owner.base
+            if isinstance(owner, np.ndarray):
+                stack.append(owner)
+            elif owner is not None and id(owner) not in seen:
+                # Buffer owned by something else (bytes, mmap, ...): count it once
+                seen.add(id(owner))
+                try:
+                    total += memoryview(owner).nbytes
+                except TypeError:
+                    total += item.nbytes
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            if hasattr(item, '__dict__'):
+                stack.append(vars(item))
+            for cls in type(item).__mro__:
+                slots = getattr(cls, '__slots__', ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if hasattr(item, name):
+                        stack.append(getattr(item, name))
+    return total
+
+
+def model_sizeof(model) -> int:
+    """
+    Approximate bytes of a loaded model
+
+    PyTorch modules count their parameters and buffers, ONNX sessions their
+    model file and spaCy pipelines their serialized size.
+    """
+    if model is None:
+        return 0
+    if hasattr(model, 'parameters') and hasattr(model, 'buffers'):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if hasattr(model, 'model_path') and os.path.isfile(model.model_path):
+        return os.path.getsize(model.model_path)
+    if hasattr(model, 'to_bytes') and hasattr(model, 'pipe_names'):
+        try:
+            return len(model.to_bytes())
+        except Exception:
+            return 0
+    if hasattr(model, 'model'):
+        return model_sizeof(model.model)
+    return 0
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident set size of this process (None where unavailable)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_report(system, include_models: bool = True) -> Dict:
+    """
+    Approximate resident memory of a GraphRAGSystem by component
+
+    Args:
+        system: The system to measure
+        include_models: Also measure the embedder, spaCy pipeline and reranker
+            (slower; they may be shared with other systems)
+
+    Returns:
+        {'components': {name: bytes}, 'corpus_bytes', 'model_bytes',
+         'process_rss_bytes'}
+    """
+    seen = set()
+    components = {
+        name: sum(deep_sizeof(getattr(system, attr, None), seen) for attr in attributes)
+        for name, attributes in MEMORY_COMPONENTS.items()
+    }
+    corpus_bytes = sum(components.values())
+    model_bytes = 0
+    if include_models:
+        for attr in MODEL_ATTRIBUTES:
+            components[f'model:{attr}'] = size = model_sizeof(getattr(system, attr, None))
+            model_bytes += size
+    return {
+        'components': components,
+        'corpus_bytes': corpus_bytes,
+        'model_bytes': model_bytes,
+        'process_rss_bytes': process_rss_bytes(),
+    }
+
+
+class Profiler:
+    def __init__(self, output_dir: str, cpu: bool = True, memory: bool = False, top: int = 30):
+        """
+        Initialize the profiler
+
+        Args:
+            output_dir: Directory for the reports (created if missing)
+            cpu: Capture cProfile statistics (.prof for pstats/snakeviz, plus a .txt summary)
+            memory: Capture tracemalloc allocations (slows the profiled call down)
+            top: Functions / allocation sites listed in the text summaries
+        """
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self._lock = threading.Lock()
+        self._active = False
+        self._count = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def capture(self, name: str):
+        """
+        Profile the enclosed block and dump its reports
+
+        Only one capture runs at a time; calls made meanwhile (nested or
+        from other threads) run unprofiled.
+        """
+        with self._lock:
+            if self._active:
+                busy = True
+            else:
+                busy, self._active = False, True
+                self._count += 1
+                stem = os.path.join(self.output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{self._count}")
+        if busy:
+            yield
+            return
+
+        started_tracing = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            started_tracing = True
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile() if self.cpu else None
+        started = time.perf_counter()
+        try:
+            if profile is not None:
+                profile.enable()
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            seconds = time.perf_counter() - started
+            try:
+                if profile is not None:
+                    self._dump_cpu(profile, stem, seconds)
+                if self.memory:
+                    self._dump_memory(before, stem)
+                print(f"Profile of {name} ({seconds:.2f}s) written to {stem}.*")
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+                with self._lock:
+                    self._active = False
+
+    def _dump_cpu(self, profile: cProfile.Profile, stem: str, seconds: float):
+        profile.dump_stats(stem + '.prof')
+        summary = io.StringIO()
+        summary.write(f"Wall time: {seconds:.3f}s\n\n")
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        with open(stem + '.txt', 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+
+    def _dump_memory(self, before: tracemalloc.Snapshot, stem: str):
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        lines = [f"Traced memory: {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak during the call", "",
+                 f"Top {self.top} allocation sites by growth during the call:"]
+        lines.extend(str(stat) for stat in after.compare_to(before, 'lineno')[:self.top])
+        lines += ["", f"Top {self.top} allocation sites by size held:"]
+        lines.extend(str(stat) for stat in after.statistics('lineno')[:self.top])
+        with open(stem + '-memory.txt', 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def profiled(method):
+    """Run a GraphRAGSystem method under the system's profiler, when one is enabled"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = getattr(self, 'profiler', None)
+        if profiler is None:
+            return method(self, *args, **kwargs)
+        with profiler.capture(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
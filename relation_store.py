@@ -0,0 +1,147 @@
+"""
+Typed relation store
+Subject-predicate-object facts with chunk provenance, indexed by entity
+and by predicate, plus the dependency-based SVO extractor that fills it
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"[a-z]+")
+_STEM_LEN = 4
+
+
+def extract_svo_triples(spacy_doc) -> List[Tuple[str, str, str]]:
+    """
+    Subject-verb-object triples from a parsed text
+
+    Subjects and objects are expanded to the named entity containing them
+    (or the noun with its compound modifiers); prepositional objects give
+    predicates like "live in". Pronoun subjects and objects are skipped.
+    """
+    entity_at = {}
+    for ent in spacy_doc.ents:
+        for i in range(ent.start, ent.end):
+            entity_at[i] = ent
+
+    def phrase(token) -> str:
+        if token.i in entity_at:
+            return entity_at[token.i].text.strip()
+        compounds = [t.text for t in token.lefts if t.dep_ == 'compound']
+        return ' '.join(compounds + [token.text])
+
+    triples = []
+    for token in spacy_doc:
+        if token.pos_ != 'VERB':
+            continue
+        subjects = [c for c in token.children if 'subj' in c.dep_ and c.pos_ != 'PRON']
+        if not subjects:
+            continue
+        lemma = token.lemma_.lower()
+        objects = [(lemma, c) for c in token.children if 'obj' in c.dep_]
+        for prep in token.children:
+            if prep.dep_ == 'prep':
+                objects.extend((f"{lemma} {prep.lower_}", c) for c in prep.children if c.dep_ == 'pobj')
+        for subj in subjects:
+            for predicate, obj in objects:
+                if obj.pos_ != 'PRON':
+                    triples.append((phrase(subj), predicate, phrase(obj)))
+    return triples
+
+
+def normalize_predicate(predicate: str) -> str:
+    return ' '.join(predicate.lower().split())
+
+
+class Fact(NamedTuple):
+    subject: str
+    predicate: str
+    object: str
+    chunks: Tuple[int, ...]  # chunks stating the fact, in order
+
+    @property
+    def support(self) -> int:
+        return len(self.chunks)
+
+    def __str__(self):
+        return f"{self.subject} {self.predicate} {self.object}"
+
+
+class RelationStore:
+    """Deduplicated (subject, predicate, object) facts with provenance"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._facts: List[Tuple[str, str, str]] = []
+        self._chunks: List[List[int]] = []
+        self._ids: Dict[Tuple[str, str, str], int] = {}
+        self._by_entity: Dict[str, List[int]] = defaultdict(list)
+        self._by_predicate: Dict[str, List[int]] = defaultdict(list)
+        self._by_stem: Dict[str, Set[str]] = defaultdict(set)  # predicate head stem -> predicates
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def add(self, subject: str, predicate: str, obj: str, chunk_idx: int):
+        """Record that a chunk states a fact"""
+        predicate = normalize_predicate(predicate)
+        if not subject or not predicate or not obj or subject == obj:
+            return
+        key = (subject, predicate, obj)
+        fact_id = self._ids.get(key)
+        if fact_id is None:
+            fact_id = self._ids[key] = len(self._facts)
+            self._facts.append(key)
+            self._chunks.append([])
+            self._by_entity[subject].append(fact_id)
+            self._by_entity[obj].append(fact_id)
+            self._by_predicate[predicate].append(fact_id)
+            self._by_stem[predicate.split()[0][:_STEM_LEN]].add(predicate)
+        chunks = self._chunks[fact_id]
+        if not chunks or chunks[-1] != chunk_idx:
+            chunks.append(chunk_idx)
+
+    def _fact(self, fact_id: int) -> Fact:
+        return Fact(*self._facts[fact_id], tuple(self._chunks[fact_id]))
+
+    def _ranked(self, fact_ids: Iterable[int], limit: Optional[int]) -> List[Fact]:
+        # Best supported first; ties keep insertion (chunk) order
+        ordered = sorted(fact_ids, key=lambda i: -len(self._chunks[i]))
+        return [self._fact(i) for i in ordered[:limit]]
+
+    def facts_for_entity(self, name: str, predicate: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Fact]:
+        """Facts with the entity as subject or object, optionally for one predicate"""
+        fact_ids = self._by_entity.get(name, ())
+        if predicate is not None:
+            predicate = normalize_predicate(predicate)
+            fact_ids = [i for i in fact_ids if self._facts[i][1] == predicate]
+        return self._ranked(fact_ids, limit)
+
+    def facts_for_predicate(self, predicate: str, limit: Optional[int] = None) -> List[Fact]:
+        return self._ranked(self._by_predicate.get(normalize_predicate(predicate), ()), limit)
+
+    def predicates(self) -> Dict[str, int]:
+        """Number of distinct facts per predicate"""
+        return {predicate: len(ids) for predicate, ids in self._by_predicate.items()}
+
+    def match_predicates(self, text: str) -> List[str]:
+        """
+        Predicates whose verb appears in a text ("founded" matches "found", "lives" matches "live in")
+
+        Compares word prefixes, so only the stem index is consulted.
+        """
+        found = []
+        for word in _WORD_RE.findall(text.lower()):
+            if len(word) < 3:
+                continue
+            # Heads shorter than the stem length ("eat") are indexed under themselves
+            candidates = self._by_stem.get(word[:_STEM_LEN], set()) | self._by_stem.get(word[:3], set())
+            for predicate in sorted(candidates):
+                head = predicate.split()[0]
+                if (word.startswith(head) or head.startswith(word)) and predicate not in found:
+                    found.append(predicate)
+        return found
@@ -0,0 +1,157 @@
+"""
+Cross-encoder reranking
+Rescores a wide pool of bi-encoder candidates with a small local
+cross-encoder, in batches, within a time budget and with a score cache
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name: str = RERANK_MODEL, batch_size: int = 16,
+                 time_budget_ms: Optional[float] = 300.0, cache_size: int = 20000,
+                 num_threads: Optional[int] = None, max_length: int = 512, model=None):
+        """
+        Initialize the reranker
+
+        Args:
+            model_name: sentence-transformers CrossEncoder model
+            batch_size: (question, chunk) pairs per forward pass
+            time_budget_ms: Scoring time per question; candidates not reached
+                keep their bi-encoder order after the scored ones (None: no limit)
+            cache_size: (question, chunk) scores kept, least recently used dropped
+            num_threads: CPU threads for PyTorch (process-wide; default: PyTorch's)
+            max_length: Tokens per pair; longer chunks are truncated by the tokenizer
+            model: Already loaded CrossEncoder to share (default: load model_name)
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.time_budget_ms = time_budget_ms
+        self.cache_size = cache_size
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            if num_threads:
+                try:
+                    import torch
+                    torch.set_num_threads(num_threads)
+                except ImportError:
+                    pass
+            model = CrossEncoder(model_name, max_length=max_length, device='cpu')
+        self.model = model
+        # Decided once per model, so every batch and cached score shares one scale
+        self._apply_sigmoid = not _outputs_probabilities(model)
+
+        self._cache: OrderedDict = OrderedDict()  # (question hash, chunk hash) -> score
+        self._lock = threading.Lock()
+        self._batch_seconds = None  # running estimate of one batch's scoring time
+        self._stats = {'questions': 0, 'pairs_scored': 0, 'cache_hits': 0,
+                       'budget_stops': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    def rerank(self, question: str, candidates: Sequence[Tuple[int, float, str]],
+               top_k: int) -> List[Tuple[int, float, str]]:
+        """
+        The top_k candidates by cross-encoder score
+
+        Candidates are scored best bi-encoder score first, so when the time
+        budget runs out the ones left unscored are the least promising.
+
+        Args:
+            question: The question
+            candidates: (chunk_idx, bi-encoder score, text), best first
+            top_k: Number of results
+
+        Returns:
+            (chunk_idx, score, text), best first; scores are cross-encoder
+            relevance probabilities, and candidates left unscored get scores
+            below all scored ones (ContextBuilder orders chunks by score)
+        """
+        started = time.perf_counter()
+        question_key = hashlib.sha1(question.strip().encode('utf-8')).digest()
+        keys = [(question_key, hashlib.sha1(text.encode('utf-8')).digest()) for _, _, text in candidates]
+
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for pos, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[pos] = self._cache[key]
+        hits = len(scores)
+
+        todo = [pos for pos in range(len(candidates)) if pos not in scores]
+        budget = None if self.time_budget_ms is None else self.time_budget_ms / 1000
+        stopped = False
+        for start in range(0, len(todo), self.batch_size):
+            elapsed = time.perf_counter() - started
+            # Skip a batch that would likely overrun the budget (the first batch always runs)
+            if budget is not None and start and elapsed + (self._batch_seconds or 0) > budget:
+                stopped = True
+                break
+            batch = todo[start:start + self.batch_size]
+            batch_started = time.perf_counter()
+            values = np.asarray(self.model.predict([(question, candidates[pos][2]) for pos in batch],
+                                                   batch_size=self.batch_size, show_progress_bar=False),
+                                dtype=np.float32).reshape(-1)
+            if self._apply_sigmoid:
+                values = 1 / (1 + np.exp(-values))
+            seconds = time.perf_counter() - batch_started
+            self._batch_seconds = seconds if self._batch_seconds is None else 0.8 * self._batch_seconds + 0.2 * seconds
+            with self._lock:
+                for pos, value in zip(batch, values):
+                    scores[pos] = float(value)
+                    self._cache[keys[pos]] = float(value)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        # Scored candidates by cross-encoder score, then the rest in bi-encoder order
+        scored = sorted(scores, key=lambda pos: (-scores[pos], pos))
+        unscored = [pos for pos in range(len(candidates)) if pos not in scores]
+        results = [(candidates[pos][0], scores[pos], candidates[pos][2]) for pos in scored]
+        # Unscored candidates stay strictly below every scored one, in bi-encoder order
+        floor = min((scores[pos] for pos in scored), default=1.0)
+        results += [(candidates[pos][0], floor * (1 - (rank + 1) / (len(unscored) + 1)), candidates[pos][2])
+                    for rank, pos in enumerate(unscored)]
+
+        ms = (time.perf_counter() - started) * 1e3
+        with self._lock:
+            self._stats['questions'] += 1
+            self._stats['pairs_scored'] += len(scores) - hits
+            self._stats['cache_hits'] += hits
+            self._stats['budget_stops'] += stopped
+            self._stats['total_ms'] += ms
+            self._stats['max_ms'] = max(self._stats['max_ms'], ms)
+        return results[:top_k]
+
+    def stats(self) -> Dict:
+        """Reranking counters and latency (ms per question)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cache_entries'] = len(self._cache)
+        stats['mean_ms'] = stats['total_ms'] / stats['questions'] if stats['questions'] else 0.0
+        return stats
+
+    def clear(self):
+        """Drop cached scores"""
+        with self._lock:
+            self._cache.clear()
+
+
+def _outputs_probabilities(model) -> bool:
+    """
+    True if the model's predict() already ends in a sigmoid
+
+    sentence-transformers names the output activation differently across
+    versions; a model without a recognizable one returns logits.
+    """
+    for attr in ('activation_fn', 'activation_fct', 'default_activation_function'):
+        activation = getattr(model, attr, None)
+        if activation is not None:
+            return type(activation).__name__ == 'Sigmoid'
+    return False
@@ -0,0 +1,284 @@
+"""
+Multi-tenant corpus registry
+Serves many corpora from one process: the embedder and spaCy model are
+loaded once and shared, tenant indexes are loaded lazily from snapshots and
+the least recently used tenants are evicted under a memory budget
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from embedders import create_embedder
+from profiling import deep_sizeof
+from graphrag_mistral import EMBEDDING_MODEL, SNAPSHOT_STATE, SPACY_MODEL, GraphRAGSystem
+
+_TENANT_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+# Per-tenant state; models and the Mistral client are shared and not counted
+CORPUS_ATTRIBUTES = (
+    'documents', 'document_embeddings', 'entity_to_chunks', 'entities', 'relationships', 'relation_store',
+    'chunk_extractions', 'chunk_sources', 'chunk_fingerprints', 'chunk_canonical', 'canonicalizer',
+    'graph', 'search_index', 'answer_cache', 'community_index',
+)
+
+
+def corpus_resident_bytes(system: GraphRAGSystem) -> int:
+    """Approximate memory held by one system's corpus (excluding shared models)"""
+    return deep_sizeof([getattr(system, name, None) for name in CORPUS_ATTRIBUTES])
+
+
+class _Tenant:
+    __slots__ = ('system', 'resident_bytes', 'signature', 'loaded_at', 'last_used', 'evicting')
+
+    def __init__(self, system: GraphRAGSystem, resident_bytes: int, signature: tuple):
+        self.system = system
+        self.resident_bytes = resident_bytes
+        self.signature = signature
+        self.loaded_at = self.last_used = time.time()
+        self.evicting = False  # being saved before removal
+
+
+class TenantRegistry:
+    def __init__(self, snapshot_root: str, mistral_api_key: str, memory_budget_mb: float = 1024,
+                 embedder=None, nlp=None, autosave: bool = True, **system_kwargs):
+        """
+        Initialize the registry
+
+        Args:
+            snapshot_root: Directory holding one snapshot directory per tenant
+            mistral_api_key: Mistral API key used by every tenant
+            memory_budget_mb: Resident corpus memory allowed before evicting tenants
+            embedder: Shared embedder (default: create one from the embedding_* options once)
+            nlp: Shared spaCy pipeline (default: load SPACY_MODEL once if installed)
+            autosave: Snapshot tenants whose corpus changed before evicting them
+            **system_kwargs: Further GraphRAGSystem options (model, graph_backend, ...)
+        """
+        self.snapshot_root = os.path.abspath(snapshot_root)
+        self.mistral_api_key = mistral_api_key
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.autosave = autosave
+        self.system_kwargs = system_kwargs
+
+        if nlp is None:
+            import spacy
+            try:
+                nlp = spacy.load(SPACY_MODEL)
+            except OSError:
+                print(f"Warning: spaCy model '{SPACY_MODEL}' not found; tenants will use Mistral extraction")
+                nlp = False
+        if embedder is None:
+            backend = system_kwargs.get('embedding_backend', 'sentence-transformers')
+            print(f"Loading shared sentence embedding model ({backend})...")
+            embedder = create_embedder(backend, EMBEDDING_MODEL,
+                                       batch_size=system_kwargs.get('embedding_batch_size', 32),
+                                       num_threads=system_kwargs.get('embedding_threads'))
+        self.nlp = nlp
+        self.embedder = embedder
+
+        self._tenants: "OrderedDict[str, _Tenant]" = OrderedDict()  # least recently used first
+        self._load_locks: Dict[str, list] = {}  # tenant id -> [lock, threads waiting or loading]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def snapshot_dir(self, tenant_id: str) -> str:
+        if not _TENANT_ID_RE.match(tenant_id) or '..' in tenant_id:
+            raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+        return os.path.join(self.snapshot_root, tenant_id)
+
+    def has_snapshot(self, tenant_id: str) -> bool:
+        return os.path.exists(os.path.join(self.snapshot_dir(tenant_id), SNAPSHOT_STATE))
+
+    def __contains__(self, tenant_id: str) -> bool:
+        with self._lock:
+            return tenant_id in self._tenants
+
+    def get(self, tenant_id: str) -> GraphRAGSystem:
+        """
+        The tenant's system, loading its snapshot if it is not resident
+
+        A tenant without a snapshot starts with an empty corpus.
+        """
+        snapshot_dir = self.snapshot_dir(tenant_id)
+        with self._lock:
+            tenant = self._touch(tenant_id)
+            if tenant is not None:
+                return tenant.system
+            load_entry = self._load_locks.setdefault(tenant_id, [threading.Lock(), 0])
+            load_entry[1] += 1
+
+        # Only one thread loads a given tenant; other tenants stay available meanwhile
+        try:
+            with load_entry[0]:
+                with self._lock:
+                    tenant = self._touch(tenant_id)
+                    if tenant is not None:
+                        return tenant.system
+                started = time.perf_counter()
+                system = self._create_system()
+                if self.has_snapshot(tenant_id):
+                    system.load_snapshot(snapshot_dir)
+                    print(f"Loaded tenant '{tenant_id}': {len(system.documents)} chunks "
+                          f"({time.perf_counter() - started:.1f}s)")
+                tenant = _Tenant(system, corpus_resident_bytes(system), self._signature(system))
+                with self._lock:
+                    self._tenants[tenant_id] = tenant
+                    self.loads += 1
+                    evicted = self._evict_over_budget(keep=tenant_id)
+        finally:
+            # Forget the lock once no thread is waiting on it
+            with self._lock:
+                load_entry[1] -= 1
+                if not load_entry[1]:
+                    del self._load_locks[tenant_id]
+        self._finish_evictions(evicted)
+        return system
+
+    def update(self, tenant_id: str):
+        """Re-measure a tenant after its corpus changed, evicting others if over budget"""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                return
+            tenant.resident_bytes = corpus_resident_bytes(tenant.system)
+            evicted = self._evict_over_budget(keep=tenant_id)
+        self._finish_evictions(evicted)
+
+    def save(self, tenant_id: str):
+        """Write a resident tenant's snapshot"""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            raise KeyError(f"Tenant '{tenant_id}' is not loaded")
+        tenant.system.save_snapshot(self.snapshot_dir(tenant_id))
+        tenant.signature = self._signature(tenant.system)
+
+    def evict(self, tenant_id: str) -> bool:
+        """Drop a tenant from memory (saving it first if changed); True if it was resident"""
+        while True:
+            with self._lock:
+                tenant = self._tenants.get(tenant_id)
+                if tenant is None:
+                    return False
+                saving = tenant.evicting
+                if not saving:
+                    if not self._needs_save(tenant):
+                        self._remove(tenant_id)
+                        break
+                    tenant.evicting = True
+            if saving:
+                time.sleep(0.05)  # another thread is saving it
+            elif self._save_and_remove(tenant_id, tenant, force=True):
+                break
+        print(f"Evicted tenant '{tenant_id}' ({tenant.resident_bytes / 1e6:.1f} MB)")
+        return True
+
+    def resident_tenants(self) -> List[str]:
+        """Resident tenant ids, least recently used first"""
+        with self._lock:
+            return list(self._tenants)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            tenants = {
+                tenant_id: {
+                    'resident_bytes': tenant.resident_bytes,
+                    'documents': len(tenant.system.documents),
+                    'nodes': tenant.system.graph.number_of_nodes(),
+                    'last_used': tenant.last_used,
+                }
+                for tenant_id, tenant in self._tenants.items()
+            }
+            return {
+                'tenants': tenants,
+                'resident_bytes': sum(t['resident_bytes'] for t in tenants.values()),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
+
+    def _create_system(self) -> GraphRAGSystem:
+        return GraphRAGSystem(self.mistral_api_key, embedder=self.embedder, nlp=self.nlp,
+                              **self.system_kwargs)
+
+    def _touch(self, tenant_id: str) -> Optional[_Tenant]:
+        tenant = self._tenants.get(tenant_id)
+        if tenant is not None:
+            self._tenants.move_to_end(tenant_id)
+            tenant.last_used = time.time()
+            self.hits += 1
+        return tenant
+
+    def _evict_over_budget(self, keep: str) -> List[tuple]:
+        # Caller holds self._lock; the most recently requested tenant is never evicted.
+        # Tenants with unsaved changes stay resident (marked evicting) until
+        # _finish_evictions has saved them, so a concurrent get() never loads
+        # an outdated snapshot; tenants already being saved are not counted
+        evicted = []
+        resident = sum(t.resident_bytes for t in self._tenants.values() if not t.evicting)
+        for tenant_id, tenant in list(self._tenants.items()):
+            if resident <= self.memory_budget_bytes:
+                break
+            if tenant_id == keep or tenant.evicting:
+                continue
+            resident -= tenant.resident_bytes
+            if self._needs_save(tenant):
+                tenant.evicting = True
+            else:
+                self._remove(tenant_id)
+            evicted.append((tenant_id, tenant))
+        return evicted
+
+    def _finish_evictions(self, evicted: List[tuple]):
+        for tenant_id, tenant in evicted:
+            if tenant.evicting and not self._save_and_remove(tenant_id, tenant, force=False):
+                continue
+            print(f"Evicted tenant '{tenant_id}' ({tenant.resident_bytes / 1e6:.1f} MB)")
+
+    def _save_and_remove(self, tenant_id: str, tenant: _Tenant, force: bool) -> bool:
+        """
+        Save a tenant marked evicting, then remove it unless it changed meanwhile
+
+        Args:
+            force: Remove it even if it was used (but not changed) while saving
+
+        Returns:
+            True if the tenant was removed
+        """
+        last_used = tenant.last_used
+        signature = self._signature(tenant.system)
+        try:
+            tenant.system.save_snapshot(self.snapshot_dir(tenant_id))
+        except BaseException:
+            with self._lock:
+                tenant.evicting = False
+            raise
+        with self._lock:
+            tenant.evicting = False
+            tenant.signature = signature
+            if self._tenants.get(tenant_id) is not tenant or self._signature(tenant.system) != signature:
+                return False  # changed during the save; stays resident
+            if not force and tenant.last_used != last_used:
+                return False  # used during the save; stays resident
+            self._remove(tenant_id)
+        return True
+
+    def _needs_save(self, tenant: _Tenant) -> bool:
+        return self.autosave and tenant.signature != self._signature(tenant.system)
+
+    def _remove(self, tenant_id: str):
+        # Caller holds self._lock
+        del self._tenants[tenant_id]
+        self.evictions += 1
+
+    @staticmethod
+    def _signature(system: GraphRAGSystem) -> tuple:
+        """Cheap fingerprint of a corpus, used to skip saving unchanged tenants"""
+        return (len(system.documents), hash(tuple(system.chunk_fingerprints)),
+                sum(extraction is not None for extraction in system.chunk_extractions))
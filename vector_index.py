@@ -0,0 +1,87 @@
+"""
+Exact cosine-similarity search over chunk embeddings
+Keeps one L2-normalized float32 copy of the corpus so each query is a single
+BLAS matrix-vector product followed by a partial top-k selection
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Row-normalized float32 matrix; reuses the input when it is already normalized"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    nonzero = norms > 0
+    if np.allclose(norms[nonzero], 1.0, atol=1e-4):
+        return matrix
+    out = matrix.copy()
+    out[nonzero] /= norms[nonzero, None]
+    return out
+
+
+class ExactSearchIndex:
+    def __init__(self, block_size: Optional[int] = None):
+        """
+        Initialize the index
+
+        Args:
+            block_size: Rows scored per step; bounds the temporary score buffer
+                for very large corpora (None scores the whole matrix at once)
+        """
+        self.block_size = block_size
+        self.matrix: Optional[np.ndarray] = None  # (n, dim) normalized float32
+
+    def __len__(self) -> int:
+        return 0 if self.matrix is None else len(self.matrix)
+
+    def build(self, embeddings: Optional[np.ndarray]):
+        """Index a new embedding matrix (None empties the index)"""
+        if embeddings is None or len(embeddings) == 0:
+            self.matrix = None
+            return
+        self.matrix = _normalize_rows(np.asarray(embeddings).reshape(len(embeddings), -1))
+
+    def search(self, query_embedding: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The top_k rows most similar to a query
+
+        Args:
+            query_embedding: (dim,) or (1, dim) query vector
+            top_k: Number of results
+
+        Returns:
+            (row indices, cosine similarities), best first; ties keep row order
+        """
+        n = len(self)
+        k = min(top_k, n)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if self.block_size is None or n <= self.block_size:
+            return self._top_k(self.matrix @ query, k, 0)
+
+        best_idx = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for start in range(0, n, self.block_size):
+            idx, scores = self._top_k(self.matrix[start:start + self.block_size] @ query, k, start)
+            best_idx = np.concatenate([best_idx, idx])
+            best_scores = np.concatenate([best_scores, scores])
+            order = np.lexsort((best_idx, -best_scores))[:k]
+            best_idx, best_scores = best_idx[order], best_scores[order]
+        return best_idx, best_scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int, offset: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((top, -scores[top]))]
+        return top + offset, scores[top]